@@ -1,12 +1,15 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
+from ..services.cassette import with_cassette
+from ..services.deadlines import check_deadline
+from ..services.hedging import maybe_hedge
+from ..services.model_policy import model_policy
+from ..services.token_usage import token_ledger
 from typing import Dict, List, Optional
+import time
 # Vector store is optional - only available when OpenAI key is provided
-try:
-    from ..services.vector_store import vector_store
-except Exception:
-    vector_store = None
+from ..services.vector_store import get_vector_store
 
 
 class BillingAgent:
@@ -21,7 +24,10 @@ class BillingAgent:
         import os
         # Only initialize LLM if OpenAI key is available
         if os.getenv("OPENAI_API_KEY"):
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3, timeout=30, request_timeout=30)
+            self.llm = with_cassette(maybe_hedge(
+                ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3, timeout=30, request_timeout=30),
+                name="billing_agent"
+            ), name="billing_agent")
         else:
             self.llm = None
         self.collection_name = "billing_documents"
@@ -81,12 +87,20 @@ class BillingAgent:
         if not self.llm:
             return "I apologize, but the AI service is not available at the moment. Please try again later or contact support."
         
+        check_deadline("billing_agent")
         try:
             # Simplified: Just answer the question directly without complex context
+            plan = model_policy.plan("billing_agent", query)
             simple_prompt = f"You are a financial advisor. Answer this question briefly and helpfully: {query}"
+            if plan.length_hint:
+                simple_prompt += f"\n{plan.length_hint}"
             
-            print(f"[Billing Agent] Calling GPT-3.5-turbo...")
-            response = self.llm.invoke(simple_prompt)
+            print(f"[Billing Agent] Calling {plan.model} (max_tokens={plan.max_tokens})...")
+            start = time.perf_counter()
+            response = self.llm.invoke(simple_prompt, **plan.invoke_kwargs())
+            elapsed = time.perf_counter() - start
+            usage = token_ledger.record("billing_agent", simple_prompt, response)
+            model_policy.record(plan, response, usage, elapsed)
             print(f"[Billing Agent] Got response: {len(response.content)} chars")
             return response.content
         except Exception as e:
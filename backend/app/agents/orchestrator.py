@@ -1,8 +1,14 @@
-from typing import TypedDict, Annotated, Literal
+from typing import TypedDict, Annotated, Literal, Optional
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import json
+import math
 import operator
+import threading
+import time
 import uuid
 import os
 
@@ -10,15 +16,190 @@ from .billing_agent import BillingAgent
 from .technical_support_agent import TechnicalSupportAgent
 from .policy_agent import PolicyComplianceAgent
 from .mock_agent import mock_agent
+from ..services.cassette import with_cassette
+from ..services.deadlines import RequestCancelled, call_timeout_kwargs, check_deadline, check_retry
+from ..services.hedging import maybe_hedge
+from ..services.metrics import metrics
+from ..services.model_policy import ROUTER_MAX_TOKENS
+from ..services.token_usage import TokenBudgetExceeded, token_ledger, usage_scope
+
+# Start retrieval for likely agents while the router LLM runs: off | likely | always
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "likely").lower()
+
+# Upper bound on agents a multi-intent question can fan out to
+MAX_PARALLEL_AGENTS = int(os.getenv("MAX_PARALLEL_AGENTS", "3"))
+
+AGENT_LABELS = {
+    "billing_agent": "💳 Billing & Transactions",
+    "technical_agent": "📱 App & Technical Support",
+    "policy_agent": "🎯 Financial Planning & Policies",
+}
+
+# OpenAI router model: needs Structured Outputs (gpt-4o-mini or later) for the enum-constrained reply
+ROUTER_OPENAI_MODEL = os.getenv("ROUTER_OPENAI_MODEL", "gpt-4o-mini")
+# Below this probability for its top label the router asks a clarifying question (0 = never)
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.5"))
+
+ROUTABLE_AGENTS = ["billing_agent", "technical_agent", "policy_agent"]
+
+# The OpenAI router can only reply {"agents": [...]} with names from ROUTABLE_AGENTS
+ROUTER_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "route",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "agents": {"type": "array", "items": {"type": "string", "enum": ROUTABLE_AGENTS}},
+            },
+            "required": ["agents"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+CLARIFYING_QUESTION = (
+    "I want to make sure the right specialist answers this. Is your question mainly about "
+    "{options}? A little more detail (the transaction, app screen or goal you mean) helps too."
+)
+
+# Mark the static router instructions as a Bedrock cache point. Only for models
+# with prompt caching on Bedrock, and it only takes effect once the prefix is
+# above the model's minimum cacheable length
+BEDROCK_PROMPT_CACHING = os.getenv("BEDROCK_PROMPT_CACHING", "false").lower() == "true"
+
+# Static instructions first and the question last, so every routing call shares
+# a byte-identical prefix that providers can serve from their prompt cache
+ROUTING_INSTRUCTIONS = """You are a routing assistant for SmartFinance AI banking support.
+Analyze the user's question (given at the end) and determine which specialized agent(s) should handle it.
+
+AGENTS:
+1. policy_agent: PRIMARY agent for savings goals, financial planning, money management, budgeting, 
+   investment advice, retirement planning, wealth building, app features overview, rewards program
+   
+2. billing_agent: Handles account balances, transactions, spending analysis, fees, charges, 
+   interest rates, refunds, payments, transfers, account management
+   
+3. technical_agent: Handles app navigation, how to use features, settings configuration, 
+   login problems, technical troubleshooting, password resets, app bugs
+
+ROUTING PRIORITY:
+- Questions about "goals", "saving", "budget", "financial advice", "how much to save", 
+  "money management", "investment", "retirement" → policy_agent
+- Questions about "balance", "transaction", "spending", "fees", "charges", "payment" → billing_agent
+- Questions about "how to use", "navigate", "settings", "login", "password", "bug" → technical_agent
+
+Respond with ONLY a JSON object whose "agents" array holds agent names (billing_agent, technical_agent,
+policy_agent). If the question contains separate requests for different agents, put every agent that is
+needed in "agents", most important first, for example: {"agents": ["billing_agent", "technical_agent"]}
+Otherwise put exactly one agent in it, for example: {"agents": ["billing_agent"]}
+
+"""
+
+
+def build_routing_prompt(question: str) -> str:
+    """Router prompt for one user question (shared with benchmarks/bench_routing.py)"""
+    return f"{ROUTING_INSTRUCTIONS}USER QUESTION: {question}"
+
+
+def build_routing_messages(question: str, cache_point: bool = False) -> list[BaseMessage]:
+    """Router messages; with cache_point the static instructions carry an Anthropic cache_control marker"""
+    if not cache_point:
+        return [HumanMessage(content=build_routing_prompt(question))]
+    return [HumanMessage(content=[
+        {"type": "text", "text": ROUTING_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": f"USER QUESTION: {question}"},
+    ])]
+
+
+def build_openai_router_llm(model: str = ROUTER_OPENAI_MODEL) -> ChatOpenAI:
+    """OpenAI router: enum-constrained JSON reply with logprobs for the label confidence"""
+    return ChatOpenAI(
+        model=model,
+        temperature=0.1,
+        max_tokens=ROUTER_MAX_TOKENS,
+        timeout=30,
+        request_timeout=30,
+        logprobs=True,
+        top_logprobs=5,
+        model_kwargs={"response_format": ROUTER_RESPONSE_FORMAT}
+    )
+
+
+def parse_routing_reply(reply: str) -> list[str]:
+    """
+    Agents named in a router reply, most important first
+    Reads the JSON reply; free text (a model that ignored the format) falls back
+    to finding the agent names in it. Empty when no agent is named
+    """
+    start, end = reply.find("{"), reply.rfind("}")
+    try:
+        named = json.loads(reply[start:end + 1])["agents"] if start != -1 else None
+    except (ValueError, KeyError, TypeError):
+        named = None
+    if isinstance(named, list):
+        agents = [agent for agent in dict.fromkeys(named) if agent in ROUTABLE_AGENTS]
+    else:
+        text = reply.lower()
+        positions = {agent: text.find(agent.split("_")[0]) for agent in ROUTABLE_AGENTS}
+        agents = sorted((agent for agent in positions if positions[agent] != -1), key=positions.get)
+    return agents[:MAX_PARALLEL_AGENTS]
+
+
+def label_probabilities(response) -> Optional[dict[str, float]]:
+    """
+    Probability of each agent as the reply's first label, from the token
+    logprobs at that position (None when the provider returned no logprobs)
+    """
+    tokens = ((getattr(response, "response_metadata", None) or {}).get("logprobs") or {}).get("content")
+    if not tokens:
+        return None
+    reply = "".join(token["token"] for token in tokens)
+    label_start = reply.find('"', reply.find("[")) + 1
+    if label_start == 0:
+        return None
+
+    offset = 0
+    for token in tokens:
+        if offset + len(token["token"]) > label_start:
+            break
+        offset += len(token["token"])
+    else:
+        return None
+    # The label may begin inside the token (e.g. '["billing'): compare what follows the shared part
+    skip = label_start - offset
+    probabilities = dict.fromkeys(ROUTABLE_AGENTS, 0.0)
+    for candidate in token.get("top_logprobs") or [token]:
+        text = candidate["token"]
+        if text[:skip] != token["token"][:skip] or not text[skip:]:
+            continue
+        for agent in ROUTABLE_AGENTS:
+            if agent.startswith(text[skip:]):
+                probabilities[agent] += math.exp(candidate["logprob"])
+                break
+    total = sum(probabilities.values())
+    if total == 0:
+        return None
+    return {agent: p / total for agent, p in probabilities.items()}
+
+
+def _merge_dicts(left: dict, right: dict) -> dict:
+    """Reducer that lets parallel agent branches each add their own response"""
+    return {**(left or {}), **(right or {})}
 
 
 class AgentState(TypedDict):
     """State for the multi-agent system"""
     messages: Annotated[list[BaseMessage], operator.add]
     next_agent: str
+    next_agents: list[str]
+    agent_responses: Annotated[dict, _merge_dicts]
     session_id: str
     final_response: str
     user_context: str
+    prefetch: dict
+    route_probabilities: dict
 
 
 class AgentOrchestrator:
@@ -53,6 +234,7 @@ class AgentOrchestrator:
         
         # Real AI mode - Try to use AWS Bedrock Claude for cost-effective routing, fallback to OpenAI
         try:
+            from botocore.config import Config as BotoConfig
             from langchain_community.chat_models import BedrockChat
             
             # Check if AWS credentials are available
@@ -71,8 +253,10 @@ class AgentOrchestrator:
                 # Set up credentials for Bedrock
                 bedrock_config = {
                     "model_id": "anthropic.claude-3-haiku-20240307-v1:0",
-                    "model_kwargs": {"temperature": 0.1, "max_tokens": 200},
-                    "region_name": aws_region
+                    "model_kwargs": {"temperature": 0.1, "max_tokens": ROUTER_MAX_TOKENS},
+                    "region_name": aws_region,
+                    # Same 30s bound as the OpenAI models; botocore's default read timeout is 60s
+                    "config": BotoConfig(connect_timeout=5, read_timeout=30, retries={"max_attempts": 2})
                 }
                 
                 # Add session token if present
@@ -80,19 +264,32 @@ class AgentOrchestrator:
                     print("✓ Using temporary AWS credentials with session token")
                     os.environ["AWS_SESSION_TOKEN"] = aws_token
                 
-                self.router_llm = BedrockChat(**bedrock_config)
+                # Hedge slow Bedrock calls against OpenAI when both are configured
+                self.router_llm = maybe_hedge(
+                    BedrockChat(**bedrock_config),
+                    name="router",
+                    alternate=self._openai_router_llm()
+                )
+                # Cache markers are Anthropic-only, so not when a hedge may resend the prompt to OpenAI
+                # (HedgedLLM keeps the models it calls as primary / alternate)
+                router_models = (getattr(self.router_llm, "primary", self.router_llm),
+                                 getattr(self.router_llm, "alternate", self.router_llm))
+                self.router_cache_point = BEDROCK_PROMPT_CACHING and all(
+                    isinstance(model, BedrockChat) for model in router_models
+                )
+                self.router_llm = with_cassette(self.router_llm, name="router")
+                # Per-call timeouts are OpenAI kwargs; Bedrock would send them in the request body
+                self.router_call_timeout = False
                 print("✓ AWS Bedrock Claude initialized successfully")
             else:
                 raise Exception("AWS_ACCESS_KEY_ID or AWS_SECRET_ACCESS_KEY not found")
         except Exception as e:
             print(f"AWS Bedrock not available ({str(e)}), using OpenAI for routing...")
-            # Fallback to OpenAI GPT-3.5-turbo for routing (cheaper than GPT-4)
-            self.router_llm = ChatOpenAI(
-                model="gpt-3.5-turbo",
-                temperature=0.1,
-                max_tokens=200
-            )
-            print("✓ OpenAI GPT-3.5-turbo initialized for routing")
+            # Fallback to OpenAI for routing (a small model with constrained output)
+            self.router_llm = with_cassette(maybe_hedge(self._openai_router_llm(), name="router"), name="router")
+            self.router_cache_point = False
+            self.router_call_timeout = True
+            print(f"✓ OpenAI {ROUTER_OPENAI_MODEL} initialized for routing")
         
         # Initialize specialized agents with error handling
         print("Initializing specialized agents...")
@@ -117,6 +314,12 @@ class AgentOrchestrator:
             print(f"⚠ Warning: Policy Compliance Agent initialization issue: {e}")
             self.policy_agent = PolicyComplianceAgent()
         
+        # Agents whose retrieval can be started speculatively alongside routing
+        self.retrieval_agents = {}
+        if self.technical_agent.uses_retrieval and SPECULATIVE_RETRIEVAL != "off":
+            self.retrieval_agents["technical_agent"] = self.technical_agent
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+        
         # Build the graph
         print("Building LangGraph workflow...")
         self.graph = self._build_graph()
@@ -125,6 +328,12 @@ class AgentOrchestrator:
         print("SmartFinance AI Agentic System Initialized")
         print("="*50 + "\n")
     
+    def _openai_router_llm(self):
+        """OpenAI router model (None if no OpenAI key is configured)"""
+        if not os.getenv("OPENAI_API_KEY"):
+            return None
+        return build_openai_router_llm()
+    
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow"""
         
@@ -135,90 +344,204 @@ class AgentOrchestrator:
         workflow.add_node("billing_agent", self._call_billing_agent)
         workflow.add_node("technical_agent", self._call_technical_agent)
         workflow.add_node("policy_agent", self._call_policy_agent)
+        workflow.add_node("merge", self._merge_responses)
+        workflow.add_node("clarify", self._ask_clarifying_question)
         
         # Set entry point
         workflow.set_entry_point("router")
         
-        # Add conditional edges from router
+        # Add conditional edges from router (one or more agents run as parallel branches)
         workflow.add_conditional_edges(
             "router",
             self._decide_next_agent,
             {
                 "billing_agent": "billing_agent",
                 "technical_agent": "technical_agent",
-                "policy_agent": "policy_agent"
+                "policy_agent": "policy_agent",
+                "clarify": "clarify"
             }
         )
         
-        # All agents end after processing
-        workflow.add_edge("billing_agent", END)
-        workflow.add_edge("technical_agent", END)
-        workflow.add_edge("policy_agent", END)
+        # All agents feed the merge node, which runs once every branch has finished
+        workflow.add_edge("billing_agent", "merge")
+        workflow.add_edge("technical_agent", "merge")
+        workflow.add_edge("policy_agent", "merge")
+        workflow.add_edge("merge", END)
+        workflow.add_edge("clarify", END)
         
         return workflow.compile()
     
-    def _route_query(self, state: AgentState) -> AgentState:
-        """Analyze query and determine which agent should handle it"""
+    def _start_speculative_retrieval(self, query: str) -> dict:
+        """
+        Start retrieval for the agents the query is likely to reach, so it runs
+        concurrently with the router LLM instead of after it
+        """
+        if not self.retrieval_agents:
+            return {}
+        
+        if SPECULATIVE_RETRIEVAL == "always":
+            candidates = list(self.retrieval_agents)
+        else:
+            # Cheap keyword prior: no signal means any agent is possible
+            category = mock_agent.determine_category(query)
+            likely = f"{category}_agent"
+            candidates = [
+                name for name in self.retrieval_agents
+                if category == "general" or name == likely
+            ]
+        
+        # Each retrieval runs in a copy of this request's context (deadline, audit turn)
+        return {
+            name: self.prefetch_executor.submit(
+                contextvars.copy_context().run, self._timed_retrieval, self.retrieval_agents[name], query
+            )
+            for name in candidates
+        }
+    
+    @staticmethod
+    def _timed_retrieval(agent, query: str) -> tuple[list, float]:
+        start = time.perf_counter()
+        docs = agent.retrieve_context(query)
+        return docs, time.perf_counter() - start
+    
+    def _cancel_unused_prefetch(self, prefetch: dict, chosen_agents: list[str]):
+        """Cancel speculative retrieval for agents the router did not pick"""
+        for name, future in prefetch.items():
+            if name in chosen_agents:
+                continue
+            if future.cancel():
+                metrics.increment("retrieval.speculative.cancelled")
+            else:
+                # Already running - the result is simply dropped
+                metrics.increment("retrieval.speculative.wasted")
+    
+    def _take_prefetched(self, state: AgentState, agent_name: str):
+        """Return prefetched documents for agent_name, or None if nothing was prefetched"""
+        future = (state.get("prefetch") or {}).get(agent_name)
+        if future is None:
+            if agent_name in self.retrieval_agents:
+                metrics.increment("retrieval.speculative.miss")
+            return None
+        
+        wait_start = time.perf_counter()
+        try:
+            docs, retrieval_time = future.result()
+        except Exception as e:
+            print(f"⚠️  Speculative retrieval failed ({e}), retrieving on demand")
+            return None
+        waited = time.perf_counter() - wait_start
+        
+        # Retrieval time that overlapped with routing never hit the critical path
+        saved = max(0.0, retrieval_time - waited)
+        metrics.increment("retrieval.speculative.hit")
+        metrics.observe("retrieval.speculative.saved", saved)
+        print(f"[Speculative] {agent_name}: retrieval {retrieval_time:.3f}s, waited {waited:.3f}s, saved {saved:.3f}s on critical path")
+        return docs
+    
+    def _route_query(self, state: AgentState) -> dict:
+        """
+        Analyze query and determine which agent should handle it
+        Returns only the keys it sets: returning the whole state would make the
+        `messages` reducer append the conversation to itself
+        """
         
+        check_deadline("routing")
         user_message = state["messages"][-1].content
+        prefetch = self._start_speculative_retrieval(user_message)
         
-        routing_prompt = f"""You are a routing assistant for SmartFinance AI banking support.
-Analyze the user's question and determine which specialized agent should handle it.
-
-AGENTS:
-1. policy_agent: PRIMARY agent for savings goals, financial planning, money management, budgeting, 
-   investment advice, retirement planning, wealth building, app features overview, rewards program
-   
-2. billing_agent: Handles account balances, transactions, spending analysis, fees, charges, 
-   interest rates, refunds, payments, transfers, account management
-   
-3. technical_agent: Handles app navigation, how to use features, settings configuration, 
-   login problems, technical troubleshooting, password resets, app bugs
-
-ROUTING PRIORITY:
-- Questions about "goals", "saving", "budget", "financial advice", "how much to save", 
-  "money management", "investment", "retirement" → policy_agent
-- Questions about "balance", "transaction", "spending", "fees", "charges", "payment" → billing_agent
-- Questions about "how to use", "navigate", "settings", "login", "password", "bug" → technical_agent
-
-USER QUESTION: {user_message}
-
-Respond with ONLY the agent name (billing_agent, technical_agent, or policy_agent)."""
-
+        routing_messages = build_routing_messages(user_message, self.router_cache_point)
         try:
-            response = self.router_llm.invoke([HumanMessage(content=routing_prompt)])
-            agent_choice = response.content.strip().lower()
+            response = self.router_llm.invoke(
+                routing_messages, **(call_timeout_kwargs() if self.router_call_timeout else {})
+            )
+        except RequestCancelled:
+            raise
         except Exception as e:
+            # No second paid call once the request's deadline has (nearly) passed -
+            # that is usually why this one timed out
+            check_retry("routing")
             # If Bedrock fails during invoke, fall back to OpenAI
             print(f"⚠️  Router LLM error ({str(e)}), falling back to OpenAI...")
-            self.router_llm = ChatOpenAI(
-                model="gpt-3.5-turbo",
-                temperature=0.1,
-                max_tokens=200
-            )
-            print("✓ Switched to OpenAI GPT-3.5-turbo for routing")
-            # Retry with OpenAI
-            response = self.router_llm.invoke([HumanMessage(content=routing_prompt)])
-            agent_choice = response.content.strip().lower()
+            self.router_llm = with_cassette(maybe_hedge(self._openai_router_llm(), name="router"), name="router")
+            self.router_cache_point = False
+            self.router_call_timeout = True
+            print(f"✓ Switched to OpenAI {ROUTER_OPENAI_MODEL} for routing")
+            # Retry with OpenAI, within what is left of the request's deadline
+            routing_messages = build_routing_messages(user_message)
+            response = self.router_llm.invoke(routing_messages, **call_timeout_kwargs())
+        token_ledger.record("router", routing_messages, response)
         
-        # Validate and clean the response
-        if "billing" in agent_choice:
-            state["next_agent"] = "billing_agent"
-        elif "technical" in agent_choice:
-            state["next_agent"] = "technical_agent"
-        elif "policy" in agent_choice:
-            state["next_agent"] = "policy_agent"
-        else:
-            # Default to billing if unclear
-            state["next_agent"] = "billing_agent"
+        next_agents, probabilities = self._decide_route(response)
+        self._cancel_unused_prefetch(prefetch, next_agents)
+        return {
+            "next_agents": next_agents,
+            "next_agent": ",".join(next_agents) or "general",
+            "prefetch": prefetch,
+            "route_probabilities": probabilities or {}
+        }
+    
+    @staticmethod
+    def _decide_route(response) -> tuple[list[str], Optional[dict[str, float]]]:
+        """
+        Agents to run for a router reply, and the label probabilities behind it
+        No agents means the question should be clarified: the reply named none,
+        or the model's confidence in its top label is below ROUTER_MIN_CONFIDENCE
+        """
+        agents = parse_routing_reply(response.content)
+        probabilities = label_probabilities(response)
+        if not agents:
+            metrics.increment("router.unparsed")
+            if ROUTER_MIN_CONFIDENCE <= 0:
+                # Clarification disabled: keep the old default
+                return ["billing_agent"], probabilities
+            metrics.increment("router.clarify")
+            return [], probabilities
         
-        return state
+        if probabilities is not None:
+            confidence = probabilities[agents[0]]
+            metrics.observe("router.confidence", confidence)
+            if confidence < ROUTER_MIN_CONFIDENCE:
+                metrics.increment("router.clarify")
+                return [], probabilities
+        return agents, probabilities
+    
+    def _decide_next_agent(self, state: AgentState) -> list[str]:
+        """Decision function for conditional edges - every returned agent runs in parallel"""
+        return state["next_agents"] or ["clarify"]
     
-    def _decide_next_agent(self, state: AgentState) -> str:
-        """Decision function for conditional edges"""
-        return state["next_agent"]
+    def _ask_clarifying_question(self, state: AgentState) -> dict:
+        """Answer an unclear question with a question back instead of guessing an agent"""
+        probabilities = state.get("route_probabilities") or {}
+        ranked = sorted(ROUTABLE_AGENTS, key=lambda agent: -probabilities.get(agent, 0.0))
+        if probabilities:
+            ranked = ranked[:2]
+        labels = [f"**{AGENT_LABELS[agent]}**" for agent in ranked]
+        options = " or ".join([", ".join(labels[:-1]), labels[-1]]) if len(labels) > 1 else labels[0]
+        final_response = CLARIFYING_QUESTION.format(options=options)
+        return {
+            "final_response": final_response,
+            "messages": [AIMessage(content=final_response)]
+        }
+    
+    def _merge_responses(self, state: AgentState) -> dict:
+        """Combine the answers from every agent that ran into one response"""
+        responses = state["agent_responses"]
+        agents = [agent for agent in state["next_agents"] if agent in responses]
+        
+        if len(agents) == 1:
+            final_response = responses[agents[0]]
+        else:
+            final_response = "\n\n".join(
+                f"**{AGENT_LABELS.get(agent, agent)}**\n\n{responses[agent]}"
+                for agent in agents
+            )
+        
+        return {
+            "final_response": final_response,
+            "messages": [AIMessage(content=final_response)]
+        }
     
-    def _call_billing_agent(self, state: AgentState) -> AgentState:
+    def _call_billing_agent(self, state: AgentState) -> dict:
         """Execute billing agent"""
         user_query = state["messages"][-1].content
         user_context = state.get("user_context")
@@ -227,23 +550,20 @@ Respond with ONLY the agent name (billing_agent, technical_agent, or policy_agen
             session_id=state["session_id"],
             user_context=user_context
         )
-        state["final_response"] = response
-        state["messages"].append(AIMessage(content=response))
-        return state
+        return {"agent_responses": {"billing_agent": response}}
     
-    def _call_technical_agent(self, state: AgentState) -> AgentState:
+    def _call_technical_agent(self, state: AgentState) -> dict:
         """Execute technical support agent"""
         user_query = state["messages"][-1].content
         user_context = state.get("user_context")
         response = self.technical_agent.process_query(
             query=user_query,
-            user_context=user_context
+            user_context=user_context,
+            context_docs=self._take_prefetched(state, "technical_agent")
         )
-        state["final_response"] = response
-        state["messages"].append(AIMessage(content=response))
-        return state
+        return {"agent_responses": {"technical_agent": response}}
     
-    def _call_policy_agent(self, state: AgentState) -> AgentState:
+    def _call_policy_agent(self, state: AgentState) -> dict:
         """Execute policy compliance agent"""
         user_query = state["messages"][-1].content
         user_context = state.get("user_context")
@@ -251,11 +571,10 @@ Respond with ONLY the agent name (billing_agent, technical_agent, or policy_agen
             query=user_query,
             user_context=user_context
         )
-        state["final_response"] = response
-        state["messages"].append(AIMessage(content=response))
-        return state
+        return {"agent_responses": {"policy_agent": response}}
     
-    def process_message(self, message: str, session_id: str = None, user_context: str = None) -> tuple[str, str]:
+    def process_message(self, message: str, session_id: str = None, user_context: str = None,
+                        enforce_budget: bool = True) -> tuple[str, str]:
         """
         Process a user message through the multi-agent system
         
@@ -263,6 +582,8 @@ Respond with ONLY the agent name (billing_agent, technical_agent, or policy_agen
             message: User's question/message
             session_id: Optional session ID for context tracking
             user_context: Optional user context (account data, preferences, etc.)
+            enforce_budget: Apply token budgets (off for offline jobs such as
+                materializing answers, which must never be trimmed)
         
         Returns:
             tuple: (response_text, agent_used)
@@ -276,25 +597,35 @@ Respond with ONLY the agent name (billing_agent, technical_agent, or policy_agen
                 print(f"[Mock AI] Processing: {message[:100]}")
                 return mock_agent.process_query(message, session_id, user_context)
             
-            print(f"[Orchestrator] Processing: {message[:100]}")
-            
-            # Create initial state
-            initial_state = AgentState(
-                messages=[HumanMessage(content=message)],
-                next_agent="",
-                session_id=session_id,
-                final_response="",
-                user_context=user_context or ""
-            )
-            
-            # Run the graph
-            print("[Orchestrator] Running graph...")
-            final_state = self.graph.invoke(initial_state)
-            
-            print(f"[Orchestrator] Complete. Agent: {final_state['next_agent']}, Response length: {len(final_state['final_response'])}")
+            with usage_scope(session_id) as usage:
+                # Raises TokenBudgetExceeded in reject mode; in trim mode agents drop optional context
+                usage.trim_context = enforce_budget and token_ledger.check_budget(session_id) == "trim"
+                
+                print(f"[Orchestrator] Processing: {message[:100]}")
+                
+                # Create initial state
+                initial_state = AgentState(
+                    messages=[HumanMessage(content=message)],
+                    next_agent="",
+                    next_agents=[],
+                    agent_responses={},
+                    session_id=session_id,
+                    final_response="",
+                    user_context=user_context or "",
+                    prefetch={},
+                    route_probabilities={}
+                )
+                
+                # Run the graph
+                print("[Orchestrator] Running graph...")
+                final_state = self.graph.invoke(initial_state)
+                
+                print(f"[Orchestrator] Complete. Agent: {final_state['next_agent']}, Response length: {len(final_state['final_response'])}")
             
             return final_state["final_response"], final_state["next_agent"]
             
+        except (TokenBudgetExceeded, RequestCancelled):
+            raise
         except Exception as e:
             print(f"[Orchestrator] ERROR: {type(e).__name__}: {str(e)}")
             import traceback
@@ -303,6 +634,24 @@ Respond with ONLY the agent name (billing_agent, technical_agent, or policy_agen
             return f"I apologize, but I encountered an error processing your request: {str(e)}", "error"
 
 
-# Global instance
-orchestrator = AgentOrchestrator()
+# Global instance - built on first use (or by the startup warm-up task)
+_orchestrator: "AgentOrchestrator | None" = None
+_orchestrator_lock = threading.Lock()
+
+
+def get_orchestrator() -> AgentOrchestrator:
+    """Return the shared orchestrator, constructing it on first call"""
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = AgentOrchestrator()
+    return _orchestrator
+
+
+def __getattr__(name: str):
+    # Backwards compatible `from app.agents.orchestrator import orchestrator`
+    if name == "orchestrator":
+        return get_orchestrator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -1,7 +1,14 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
-from typing import Optional
+from ..services.cassette import with_cassette
+from ..services.deadlines import check_deadline
+from ..services.hedging import maybe_hedge
+from ..services.model_policy import model_policy
+from ..services.token_usage import current_usage, token_ledger
+from typing import List, Optional
+import re
+import time
 
 
 class PolicyComplianceAgent:
@@ -17,7 +24,10 @@ class PolicyComplianceAgent:
         import os
         # Only initialize LLM if OpenAI key is available
         if os.getenv("OPENAI_API_KEY"):
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.1, timeout=30, request_timeout=30)
+            self.llm = with_cassette(maybe_hedge(
+                ChatOpenAI(model="gpt-3.5-turbo", temperature=0.1, timeout=30, request_timeout=30),
+                name="policy_agent"
+            ), name="policy_agent")
         else:
             self.llm = None
         
@@ -69,8 +79,20 @@ class PolicyComplianceAgent:
         Provide accurate, authoritative answers based on the comprehensive policy documentation.
         Be clear, helpful, and aim to empower users to take control of their financial future."""
         
+        self.answer_instructions = """Please provide a personalized, accurate answer based on the policies and the user's financial profile.
+Reference their specific numbers when relevant (balance, goals, rewards, etc.) to make the response feel personalized and actionable."""
+        
         # Static policy context (loaded at initialization)
         self.static_context = self._load_static_policies()
+        
+        # Everything that never changes goes in one byte-stable system message, so
+        # the provider's prompt cache can serve it; the per-request parts follow it
+        self.static_system_prompt = f"""{self.system_prompt}
+
+{self.answer_instructions}
+
+SmartFinance AI Policies & Features:
+{self.static_context}"""
     
     def _load_static_policies(self) -> str:
         """Load static policy documents into memory"""
@@ -333,14 +355,42 @@ Arbitration required for disputes exceeding $10,000.
 """
         return policies
     
+    def _split_sections(self) -> List[str]:
+        """Split the static policies into their numbered sections"""
+        return [section.strip() for section in re.split(r"\n(?=\d+\. [A-Z])", self.static_context)[1:]]
+    
+    def _relevant_sections(self, query: str, limit: int = 3) -> str:
+        """Numbered policy sections sharing the most words with the query"""
+        words = {word for word in re.findall(r"[a-z]+", query.lower()) if len(word) > 3}
+        scored = []
+        for position, section in enumerate(self._split_sections()):
+            score = sum(1 for word in words if word in section.lower())
+            if score:
+                scored.append((score, position, section))
+        best = sorted(scored, key=lambda item: (-item[0], item[1]))[:limit]
+        return "\n\n".join(section for _, _, section in sorted(best, key=lambda item: item[1]))
+    
     def process_query(self, query: str, user_context: str = None) -> str:
         """Process policy query using Pure CAG strategy"""
         
         if not self.llm:
             return "I apologize, but the AI service is not available at the moment. Please try again later or contact support."
         
+        # Over budget: send only the policy sections that match the question
+        # (after the static prefix and the user's profile, since they vary per question)
+        usage = current_usage()
+        trim = usage is not None and usage.trim_context
+        if trim:
+            system_prompt = f"{self.system_prompt}\n\n{self.answer_instructions}"
+            policy_context = f"SmartFinance AI Policies & Features:\n{self._relevant_sections(query)}\n\n"
+        else:
+            system_prompt = self.static_system_prompt
+            policy_context = ""
+        
         # Use provided user context or generic approach
-        if not user_context:
+        if not user_context and trim:
+            user_context = ""
+        elif not user_context:
             user_context = """
 GENERAL CONTEXT:
 You are helping a SmartFinance AI customer with financial planning and policy questions.
@@ -348,23 +398,26 @@ Provide helpful advice and information without assuming specific account details
 Focus on general guidance, best practices, and explaining features.
 """
         
+        # Model tier and answer length for this question
+        plan = model_policy.plan("policy_agent", query)
+        
         # Use pre-loaded static context (no retrieval needed)
         prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"""SmartFinance AI Policies & Features:
-{self.static_context}
-
-{user_context}
-
-User Question: {query}
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"""{user_context}
 
-Please provide a personalized, accurate answer based on the policies and user's financial profile above.
-Reference their specific numbers when relevant (balance, goals, rewards, etc.) to make the response feel personalized and actionable.""")
+{policy_context}User Question: {query}
+{plan.length_hint}""")
         ])
         
         # Generate response
         messages = prompt.format_messages()
-        response = self.llm.invoke(messages)
+        check_deadline("policy_agent")
+        start = time.perf_counter()
+        response = self.llm.invoke(messages, **plan.invoke_kwargs())
+        elapsed = time.perf_counter() - start
+        usage = token_ledger.record("policy_agent", messages, response)
+        model_policy.record(plan, response, usage, elapsed)
         
         return response.content
 
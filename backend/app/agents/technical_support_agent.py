@@ -1,11 +1,17 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, SystemMessage
+from ..services.audit import doc_id, note_retrieved
+from ..services.cassette import with_cassette
+from ..services.deadlines import check_deadline
+from ..services.hedging import maybe_hedge
+from ..services.model_policy import model_policy
+from ..services.token_usage import current_usage, token_ledger
+from typing import List, Optional
+import time
 # Vector store is optional - only available when OpenAI key is provided
-try:
-    from ..services.vector_store import vector_store
-except Exception:
-    vector_store = None
+from ..services.vector_store import get_vector_store
+from ..services.context_packing import CONTEXT_CANDIDATES, context_packer
 
 
 class TechnicalSupportAgent:
@@ -20,10 +26,15 @@ class TechnicalSupportAgent:
         import os
         # Only initialize LLM if OpenAI key is available
         if os.getenv("OPENAI_API_KEY"):
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.2, timeout=30, request_timeout=30)
+            self.llm = with_cassette(maybe_hedge(
+                ChatOpenAI(model="gpt-3.5-turbo", temperature=0.2, timeout=30, request_timeout=30),
+                name="technical_agent"
+            ), name="technical_agent")
         else:
             self.llm = None
         self.collection_name = "technical_documents"
+        self.vector_store = get_vector_store()
+        self.uses_retrieval = self.vector_store is not None
         
         self.system_prompt = """You are a technical support specialist and app features expert for SmartFinance AI's 
         digital banking platform.
@@ -108,15 +119,50 @@ class TechnicalSupportAgent:
         
         Provide clear, step-by-step solutions. Be patient and supportive.
         If a problem requires escalation to a human specialist, clearly state that and provide alternative solutions."""
+        
+        # Static instructions join the system prompt so every request shares a
+        # byte-stable prefix the provider's prompt cache can serve
+        self.static_system_prompt = f"""{self.system_prompt}
+
+Please provide a clear, step-by-step solution or guidance based on the documentation and the user's app status.
+Reference specific features they have access to and make navigation instructions very clear."""
+    
+    def retrieve_context(self, query: str) -> List[str]:
+        """
+        Retrieve supporting documents for a query from the knowledge base
+        Candidates are reranked by MMR, stripped of repeated sentences and
+        packed into CONTEXT_TOKEN_BUDGET tokens
+        """
+        if not self.vector_store:
+            return []
+        check_deadline("retrieval")
+        query_vector, candidates = self.vector_store.search(
+            query,
+            collection_names=[self.collection_name],
+            k=CONTEXT_CANDIDATES
+        )
+        note_retrieved("technical_agent", [doc_id(candidate["metadata"]) for candidate in candidates])
+        return context_packer.pack(query_vector, candidates)
     
-    def process_query(self, query: str, user_context: str = None) -> str:
-        """Process technical support query using Pure RAG strategy"""
+    def process_query(self, query: str, user_context: str = None, context_docs: Optional[List[str]] = None) -> str:
+        """
+        Process technical support query using Pure RAG strategy
+        
+        context_docs may be supplied by the orchestrator when retrieval was
+        started speculatively in parallel with routing
+        """
         
         if not self.llm:
             return "I apologize, but the AI service is not available at the moment. Please try again later or contact support."
         
+        # Over budget: skip the generic app status and keep only the best docs
+        usage = current_usage()
+        trim = usage is not None and usage.trim_context
+        
         # Use provided user context or generic approach
-        if not user_context:
+        if not user_context and trim:
+            user_context = ""
+        elif not user_context:
             user_context = """
 GENERAL USER APP STATUS:
 • App Version: Latest (up to date)
@@ -133,33 +179,39 @@ GENERAL USER APP STATUS:
         
         # Retrieve context from vector store if available
         context = ""
-        if vector_store:
-            context_docs = vector_store.query_documents(
-                collection_name=self.collection_name,
-                query=query,
-                k=4  # Get more results for technical issues
-            )
+        if context_docs is None and self.vector_store:
+            context_docs = self.retrieve_context(query)
+        if context_docs is not None:
+            if trim:
+                context_docs = context_docs[:2]
             context = "\n\n".join(context_docs)
         else:
             context = "Technical documentation not available - providing general guidance."
         
+        # Model tier and answer length for this question
+        plan = model_policy.plan("technical_agent", query)
+        
         # Create prompt with context
+        # Most stable first: the user's app status changes less often than the retrieved docs
         prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=f"""Technical Documentation:
-{context}
+            SystemMessage(content=self.static_system_prompt),
+            HumanMessage(content=f"""{user_context}
 
-{user_context}
+Technical Documentation:
+{context}
 
 User Issue/Question: {query}
-
-Please provide a clear, step-by-step solution or guidance based on the documentation and user's app status above.
-Reference specific features they have access to and make navigation instructions very clear.""")
+{plan.length_hint}""")
         ])
         
         # Generate response
         messages = prompt.format_messages()
-        response = self.llm.invoke(messages)
+        check_deadline("technical_agent")
+        start = time.perf_counter()
+        response = self.llm.invoke(messages, **plan.invoke_kwargs())
+        elapsed = time.perf_counter() - start
+        usage = token_ledger.record("technical_agent", messages, response)
+        model_policy.record(plan, response, usage, elapsed)
         
         return response.content
 
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+import hmac
+import os
+
+from ..services.ingestion import IngestionInProgress, ingestion_jobs
+from ..services.vector_store import get_vector_store
+
+# Admin endpoints are disabled unless a key is configured
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
+
+router = APIRouter()
+
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Check the X-Admin-Key header against ADMIN_API_KEY"""
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (set ADMIN_API_KEY)")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+@router.post("/ingest", status_code=202, dependencies=[Depends(require_admin)])
+def start_ingestion():
+    """
+    Re-index the knowledge base in the background
+    Plain def: FastAPI runs it in the threadpool, since the first
+    get_vector_store() opens the Chroma client synchronously
+    New collection versions are built alongside the live ones and swapped in
+    atomically when complete; poll GET /ingest/{job_id} for progress
+    """
+    store = get_vector_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Vector store not available (mock AI mode)")
+    try:
+        job = ingestion_jobs.start(store)
+    except IngestionInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.as_dict()
+
+
+@router.get("/ingest", dependencies=[Depends(require_admin)])
+def list_ingestion_jobs():
+    """Recent ingestion jobs and the collection versions currently being served"""
+    store = get_vector_store()
+    return {
+        "jobs": [job.as_dict() for job in ingestion_jobs.list()],
+        "aliases": store.aliases.all() if store is not None else {},
+    }
+
+
+@router.get("/ingest/{job_id}", dependencies=[Depends(require_admin)])
+async def get_ingestion_job(job_id: str):
+    """Status and progress of one ingestion job"""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingestion job")
+    return job.as_dict()
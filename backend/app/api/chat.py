@@ -1,81 +1,200 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from sse_starlette.sse import EventSourceResponse
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, List, Optional
 import json
 import asyncio
+import os
+import time
+import uuid
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 
-from ..models.schemas import ChatRequest, ChatResponse
-from ..agents.orchestrator import orchestrator
+from pydantic import ValidationError
+
+from ..models.schemas import ChatRequest, ChatBatchRequest, ChatResponse, UserContext
+from ..services.audit import audit_log, audit_scope
+from ..services.deadlines import RequestCancelled, RequestDeadline, deadline_scope
+from ..services.metrics import metrics
+from ..services.warmup import warmup_state
+from ..services.stream_writer import encode_frame, frame_coalescer, sse_event
+from ..services.token_usage import ANONYMOUS_SESSION, RequestUsage, is_anonymous_session, TokenBudgetExceeded, token_ledger, usage_scope
+from ..services.answer_cache import precomputed_answers
+from ..services.user_context import user_context_cache
 
 # Thread pool for running synchronous operations
 executor = ThreadPoolExecutor(max_workers=4)
 
+# Separate pool for bulk jobs so batch replays never starve interactive chat
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "5000"))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_CONCURRENCY, thread_name_prefix="batch")
+
+# WebSocket chat: seconds between pushed health signals, and overlapping turns per connection
+WS_HEALTH_INTERVAL = float(os.getenv("WS_HEALTH_INTERVAL", "20"))
+WS_MAX_CONCURRENT_TURNS = int(os.getenv("WS_MAX_CONCURRENT_TURNS", "4"))
+
 router = APIRouter()
 
 
-async def generate_chat_stream(message: str, session_id: str, user_context: str = None) -> AsyncGenerator[str, None]:
+def process_message(message: str, session_id: str, user_context: str = None,
+                    deadline: Optional[RequestDeadline] = None) -> tuple[str, str, Dict]:
     """
-    Generate streaming response for chat
-    Simulates token-by-token streaming for better UX
+    Run a message through the orchestrator (blocking - call from the executor)
+    The orchestrator module, LangGraph and the agents are imported on first use
+    so they stay off the startup path
+    Raises RequestCancelled if `deadline` is cancelled or expires before the
+    next routing, retrieval or LLM step
+    Every turn, answered or not, is queued for the audit log
+    Returns (response, agent, token usage of this request)
+    """
+    with audit_scope(session_id, message) as turn:
+        # Canonical quick questions are answered from the materialized table,
+        # unless the user has a profile the agents would personalize the answer with
+        precomputed = precomputed_answers.lookup(message, user_context)
+        if precomputed:
+            response_text, agent_used = precomputed
+            audit_log.submit(turn.record("ok", agent_used, response_text, precomputed=True))
+            return response_text, agent_used, RequestUsage(session_id).summary()
+        
+        from ..agents.orchestrator import get_orchestrator
+        with usage_scope(session_id) as usage, deadline_scope(deadline):
+            try:
+                response_text, agent_used = get_orchestrator().process_message(message, session_id, user_context)
+            except RequestCancelled as e:
+                _record_cancelled_work(usage.summary())
+                audit_log.submit(turn.record(f"cancelled:{e.reason}", "", "", usage.summary()))
+                raise
+            except TokenBudgetExceeded as e:
+                audit_log.submit(turn.record("rejected", "", str(e), usage.summary()))
+                raise
+        summary = usage.summary()
+        if deadline is not None and deadline.cancelled:
+            # Finished, but nobody is waiting for the answer any more
+            _record_cancelled_work(summary)
+        else:
+            metrics.increment("work.completed.llm_calls", len(summary["calls"]))
+        audit_log.submit(turn.record("ok", agent_used, response_text, summary))
+    return response_text, agent_used, summary
+
+
+def _record_cancelled_work(summary: Dict):
+    """LLM calls and tokens already spent on a request that was cancelled"""
+    metrics.increment("work.cancelled.llm_calls", len(summary["calls"]))
+    metrics.increment("work.cancelled.tokens", summary["total_tokens"])
+
+
+async def run_cancellable(pool: ThreadPoolExecutor, deadline: RequestDeadline, *args) -> tuple[str, str, Dict]:
+    """
+    Run process_message in `pool` under `deadline`
+    If the caller is cancelled (client disconnected) or the deadline passes,
+    the worker is told to stop at its next checkpoint and this returns at once
     """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(pool, process_message, *args, deadline)
+    # An abandoned worker usually ends with RequestCancelled; nobody awaits it then
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
     try:
-        # Get response from orchestrator (run in thread pool to avoid blocking)
+        return await asyncio.wait_for(asyncio.shield(future), deadline.remaining())
+    except asyncio.TimeoutError:
+        deadline.cancel("deadline")
+        metrics.increment("requests.cancelled.deadline")
+        raise RequestCancelled("deadline", "response")
+    except asyncio.CancelledError:
+        deadline.cancel("client")
+        metrics.increment("requests.cancelled.client")
+        raise
+
+
+def profile_key(session_id: Optional[str]) -> Optional[str]:
+    """
+    Profile cache key for a session - None for requests without one, whose
+    profile must never be shared with other session-less clients
+    user_id is not used: it comes from the client and is not authenticated
+    """
+    if is_anonymous_session(session_id):
+        return None
+    return f"session:{session_id}"
+
+
+def resolve_user_context(request: ChatRequest, session_id: Optional[str]) -> Optional[str]:
+    """Merge the request's context changes into the session's cached profile and render it"""
+    changes = request.context.model_dump(exclude_unset=True) if request.context else None
+    return user_context_cache.resolve(profile_key(session_id), changes, request.user_context)
+
+
+async def chat_frames(message: str, session_id: str, user_context: str = None,
+                      include_usage: bool = False) -> AsyncGenerator[Dict, None]:
+    """
+    Generate the {content, agent, done} frames for one chat turn
+    Shared by the SSE and WebSocket transports
+    """
+    try:
+        # Get response from orchestrator (run in thread pool to avoid blocking);
+        # a client disconnect cancels this generator and the upstream work with it
         print(f"Processing message: {message[:50]}...")
-        loop = asyncio.get_event_loop()
-        response_text, agent_used = await loop.run_in_executor(
+        response_text, agent_used, usage = await run_cancellable(
             executor,
-            orchestrator.process_message,
+            RequestDeadline(),
             message,
             session_id,
             user_context
         )
+        metrics.increment("requests.completed")
         print(f"Got response from {agent_used}: {len(response_text)} chars")
         
-        # Stream the response in chunks (not word by word - too slow!)
-        words = response_text.split()
-        chunk_size = 3  # Send 3 words at a time for faster streaming
-        
-        for i in range(0, len(words), chunk_size):
-            # Get chunk of words
-            chunk_words = words[i:i + chunk_size]
-            chunk = " ".join(chunk_words)
-            
-            # Add space after chunk if not at the end
-            if i + chunk_size < len(words):
-                chunk += " "
-            
-            # Yield as server-sent event
-            data = {
+        # Stream the response in adaptive frames: a small first frame for
+        # fast first paint, then larger frames (no artificial delay)
+        for chunk in frame_coalescer.frames(response_text):
+            yield {
                 "content": chunk,
                 "agent": agent_used,
                 "done": False
             }
-            yield f"data: {json.dumps(data)}\n\n"
-            
-            # Minimal delay for streaming effect (much faster)
-            await asyncio.sleep(0.01)
         
         # Send completion signal
-        final_data = {
+        done_frame = {
             "content": "",
             "agent": agent_used,
             "done": True
         }
-        yield f"data: {json.dumps(final_data)}\n\n"
+        if include_usage:
+            done_frame["usage"] = usage
+        yield done_frame
         
+    except TokenBudgetExceeded as e:
+        yield {
+            "content": str(e),
+            "agent": "error",
+            "done": True
+        }
+    except RequestCancelled:
+        yield {
+            "content": "Sorry, this request took too long to answer. Please try again.",
+            "agent": "error",
+            "done": True
+        }
     except Exception as e:
-        print(f"ERROR in generate_chat_stream: {type(e).__name__}: {str(e)}")
+        print(f"ERROR in chat_frames: {type(e).__name__}: {str(e)}")
         import traceback
         traceback.print_exc()
-        error_data = {
+        yield {
             "content": f"I apologize, but I encountered an error: {str(e)}. Please try again.",
             "agent": "error",
             "done": True
         }
-        yield f"data: {json.dumps(error_data)}\n\n"
+
+
+async def generate_chat_stream(message: str, session_id: str, user_context: str = None,
+                               include_usage: bool = False) -> AsyncGenerator[bytes, None]:
+    """
+    Generate streaming response for chat
+    Simulates token-by-token streaming for better UX
+    """
+    try:
+        async for frame in chat_frames(message, session_id, user_context, include_usage):
+            # Yield as a pre-encoded server-sent event
+            yield sse_event(frame)
     finally:
         # Ensure connection is properly closed
         await asyncio.sleep(0)
@@ -93,10 +212,15 @@ async def chat_stream(request: ChatRequest):
         if not request.message or len(request.message.strip()) == 0:
             raise HTTPException(status_code=400, detail="Message cannot be empty")
         
-        session_id = request.session_id or "default"
+        session_id = request.session_id or ANONYMOUS_SESSION
         
         return EventSourceResponse(
-            generate_chat_stream(request.message, session_id, request.user_context),
+            generate_chat_stream(
+                request.message,
+                session_id,
+                resolve_user_context(request, session_id),
+                request.include_usage
+            ),
             media_type="text/event-stream"
         )
     except Exception as e:
@@ -106,6 +230,116 @@ async def chat_stream(request: ChatRequest):
         raise
 
 
+def _health_signal() -> Dict:
+    return {
+        "type": "health",
+        "status": "healthy",
+        "ready": warmup_state.ready,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    WebSocket chat channel - many turns of one session over one connection
+    
+    Client messages:
+        {"type": "chat", "request_id": "...", "message": "...", "context": {...changed fields}, "include_usage": bool}
+        {"type": "cancel", "request_id": "..."}
+        {"type": "ping"}
+    Server messages:
+        {"type": "chunk", "request_id": "...", "content": "...", "agent": "...", "done": bool}
+        {"type": "cancelled" | "error", "request_id": "...", ...}
+        {"type": "health", "status": "healthy", "ready": bool, "timestamp": "..."} (pushed periodically)
+    """
+    await websocket.accept()
+    session_id = websocket.query_params.get("session_id") or f"ws-{uuid.uuid4()}"
+    turns: Dict[str, asyncio.Task] = {}
+    send_lock = asyncio.Lock()
+    
+    async def send(payload: Dict):
+        async with send_lock:
+            await websocket.send_text(encode_frame(payload).decode("utf-8"))
+    
+    async def run_turn(request_id: str, message: str, user_context: str = None, include_usage: bool = False):
+        try:
+            async for frame in chat_frames(message, session_id, user_context, include_usage):
+                await send({"type": "chunk", "request_id": request_id, **frame})
+        finally:
+            turns.pop(request_id, None)
+    
+    async def push_health():
+        while True:
+            await asyncio.sleep(WS_HEALTH_INTERVAL)
+            await send(_health_signal())
+    
+    metrics.increment("ws.connections")
+    health_task = asyncio.create_task(push_health())
+    await send({**_health_signal(), "session_id": session_id})
+    
+    try:
+        while True:
+            # Bad input gets an error frame; it must not end the socket and its in-flight turns
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if frame.get("text") is None:
+                await send({"type": "error", "request_id": None, "content": "Only text frames are supported"})
+                continue
+            try:
+                data = json.loads(frame["text"])
+            except ValueError:
+                await send({"type": "error", "request_id": None, "content": "Invalid JSON"})
+                continue
+            if not isinstance(data, dict):
+                await send({"type": "error", "request_id": None, "content": "Expected a JSON object"})
+                continue
+            
+            kind = data.get("type", "chat")
+            request_id = str(data.get("request_id") or uuid.uuid4())
+            
+            if kind == "chat":
+                message = data.get("message") or ""
+                if not isinstance(message, str) or not isinstance(data.get("user_context") or "", str):
+                    await send({"type": "error", "request_id": request_id, "content": "message and user_context must be strings"})
+                elif not message.strip():
+                    await send({"type": "error", "request_id": request_id, "content": "Message cannot be empty"})
+                elif request_id in turns:
+                    await send({"type": "error", "request_id": request_id, "content": "Duplicate request_id"})
+                elif len(turns) >= WS_MAX_CONCURRENT_TURNS:
+                    await send({"type": "error", "request_id": request_id, "content": "Too many concurrent requests"})
+                else:
+                    try:
+                        changes = UserContext.model_validate(data["context"]).model_dump(exclude_unset=True) if data.get("context") else None
+                    except ValidationError as e:
+                        await send({"type": "error", "request_id": request_id, "content": f"Invalid context: {e.errors()[0]['msg']}"})
+                        continue
+                    user_context = user_context_cache.resolve(profile_key(session_id), changes, data.get("user_context"))
+                    metrics.increment("ws.turns")
+                    turns[request_id] = asyncio.create_task(
+                        run_turn(request_id, message, user_context, bool(data.get("include_usage")))
+                    )
+            elif kind == "cancel":
+                task = turns.pop(request_id, None)
+                if task:
+                    task.cancel()
+                    metrics.increment("ws.turns.cancelled")
+                    await send({"type": "cancelled", "request_id": request_id})
+            elif kind == "ping":
+                await send({"type": "pong", "timestamp": datetime.now().isoformat()})
+            else:
+                await send({"type": "error", "request_id": request_id, "content": f"Unknown message type: {kind}"})
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        health_task.cancel()
+        for task in list(turns.values()):
+            task.cancel()
+            metrics.increment("ws.turns.cancelled")
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -116,29 +350,127 @@ async def chat(request: ChatRequest):
         if not request.message or len(request.message.strip()) == 0:
             raise HTTPException(status_code=400, detail="Message cannot be empty")
         
-        session_id = request.session_id or "default"
+        session_id = request.session_id or ANONYMOUS_SESSION
         
         # Get response from orchestrator (run in thread pool to avoid blocking)
-        loop = asyncio.get_event_loop()
-        response_text, agent_used = await loop.run_in_executor(
+        response_text, agent_used, usage = await run_cancellable(
             executor,
-            orchestrator.process_message,
+            RequestDeadline(),
             request.message,
             session_id,
-            request.user_context
+            resolve_user_context(request, session_id)
         )
+        metrics.increment("requests.completed")
         
         return ChatResponse(
             message=response_text,
             agent_used=agent_used,
             session_id=session_id,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            usage=usage if request.include_usage else None
         )
         
+    except TokenBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except RequestCancelled:
+        raise HTTPException(status_code=504, detail="Request took too long to answer")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 
+async def generate_batch_results(requests: List[ChatRequest], max_concurrency: int) -> AsyncGenerator[bytes, None]:
+    """
+    Run many chat requests with bounded parallelism and yield one NDJSON line
+    per request as soon as its answer is ready (completion order, not input order)
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    # Identical prompts (same session, message and user context) are answered once;
+    # the session is part of the key so every session is charged for its own rows
+    groups: Dict[tuple, List[int]] = {}
+    contexts: Dict[int, Optional[str]] = {}
+    for index, request in enumerate(requests):
+        if not request.message or not request.message.strip():
+            yield encode_frame({"index": index, "error": "Message cannot be empty"}) + b"\n"
+            continue
+        # Rows without a session use only their own context, never the shared profile cache
+        contexts[index] = resolve_user_context(request, request.session_id)
+        key = (request.session_id, request.message.strip(), contexts[index] or "")
+        groups.setdefault(key, []).append(index)
+    
+    async def run_group(indices: List[int]):
+        first = requests[indices[0]]
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                # No time limit for bulk jobs, but a disconnect still stops running requests
+                response_text, agent_used, usage = await run_cancellable(
+                    batch_executor,
+                    RequestDeadline(timeout=None),
+                    first.message,
+                    first.session_id or ANONYMOUS_SESSION,
+                    contexts[indices[0]]
+                )
+            except TokenBudgetExceeded as e:
+                return indices, None, str(e), None, time.perf_counter() - start
+            except Exception as e:
+                # One failing group must not end the stream (and cancel the rest of the batch)
+                print(f"[Batch] Request {indices[0]} failed: {type(e).__name__}: {e}")
+                return indices, None, f"Error processing request: {e}", None, time.perf_counter() - start
+        return indices, response_text, agent_used, usage, time.perf_counter() - start
+    
+    tasks = [asyncio.create_task(run_group(indices)) for indices in groups.values()]
+    metrics.increment("batch.requests", len(requests))
+    # Empty rows were rejected above, not deduplicated
+    metrics.increment("batch.deduplicated", sum(len(indices) - 1 for indices in groups.values()))
+    
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indices, response_text, agent_used, usage, elapsed = await next_done
+            for position, index in enumerate(indices):
+                if response_text is None:
+                    # agent_used carries the error message
+                    yield encode_frame({"index": index, "error": agent_used}) + b"\n"
+                    continue
+                line = {
+                    "index": index,
+                    "session_id": requests[index].session_id,
+                    "message": response_text,
+                    "agent_used": agent_used,
+                    "deduplicated": position > 0,
+                    "latency_ms": round(elapsed * 1000, 1),
+                    "timestamp": datetime.now().isoformat()
+                }
+                # Tokens are only spent once per deduplicated group
+                if requests[index].include_usage:
+                    line["usage"] = usage if position == 0 else None
+                yield encode_frame(line) + b"\n"
+    finally:
+        # Client went away - drop requests that have not started and stop running ones
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/chat/batch")
+async def chat_batch(request: ChatBatchRequest):
+    """
+    Batch chat endpoint for offline evaluation and bulk jobs
+    Streams one NDJSON result per request as each one finishes
+    """
+    if len(request.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({len(request.requests)} requests, max {BATCH_MAX_REQUESTS})"
+        )
+    
+    max_concurrency = min(request.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    
+    return StreamingResponse(
+        generate_batch_results(request.requests, max_concurrency),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -148,3 +480,9 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Runtime metrics (LLM latency, hedging, token usage, etc.)"""
+    return {**metrics.snapshot(), "tokens": token_ledger.snapshot()}
@@ -11,15 +11,34 @@ print("🔑 AWS_SECRET_ACCESS_KEY:", os.getenv("AWS_SECRET_ACCESS_KEY")[:20] + "
 print("🔑 AWS_SESSION_TOKEN:", "Present (" + str(len(os.getenv("AWS_SESSION_TOKEN", ""))) + " chars)" if os.getenv("AWS_SESSION_TOKEN") else "None")
 
 # NOW import everything else (orchestrator will see the env vars)
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from .api.chat import router as chat_router
+from .api.admin import router as admin_router
+from .services.audit import audit_log
+from .services.warmup import run_warmup, warmup_state
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the orchestrator and open connections in the background so the
+    # process answers /health/live as soon as it starts
+    warmup_task = asyncio.create_task(run_warmup())
+    yield
+    warmup_task.cancel()
+    # Write every queued audit record before the process exits
+    await asyncio.to_thread(audit_log.close)
+
 
 # Create FastAPI app
 app = FastAPI(
     title="SmartFinance AI API",
     description="Intelligent Financial Support Application with Multi-Agent AI System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -43,6 +62,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(chat_router, prefix="/api", tags=["chat"])
+app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -74,6 +94,21 @@ async def health():
     }
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe - the process is up and serving HTTP"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe - 503 until the orchestrator and vector store are warm"""
+    state = warmup_state.as_dict()
+    if not warmup_state.ready:
+        return JSONResponse(status_code=503, content=state)
+    return state
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
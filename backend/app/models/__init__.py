@@ -1,4 +1,3 @@
-from .schemas import ChatMessage, ChatRequest, ChatResponse, AgentType
-
-__all__ = ["ChatMessage", "ChatRequest", "ChatResponse", "AgentType"]
+from .schemas import ChatMessage, UserContext, ChatRequest, ChatBatchRequest, ChatResponse, AgentType
 
+__all__ = ["ChatMessage", "UserContext", "ChatRequest", "ChatBatchRequest", "ChatResponse", "AgentType"]
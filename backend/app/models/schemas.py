@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 
 
@@ -9,11 +9,32 @@ class ChatMessage(BaseModel):
     timestamp: Optional[datetime] = None
 
 
+class UserContext(BaseModel):
+    """Structured user profile - send only the fields that changed, null clears a field"""
+    model_config = ConfigDict(extra="forbid")
+
+    total_balance: Optional[float] = Field(None, ge=0, description="Account balance in dollars")
+    balance_change_pct: Optional[float] = Field(None, description="Balance change this month, in percent")
+    saved_this_month: Optional[float] = Field(None, ge=0, description="Amount saved this month")
+    savings_goal: Optional[float] = Field(None, ge=0, description="Monthly savings goal")
+    rewards_points: Optional[int] = Field(None, ge=0, description="Rewards points balance")
+    rewards_tier: Optional[Literal["Silver", "Gold", "Platinum"]] = Field(None, description="Rewards tier (derived from points if omitted)")
+    active_goals: Optional[int] = Field(None, ge=0, description="Number of active savings goals")
+    premium: Optional[bool] = Field(None, description="Whether premium features are enabled")
+
+
 class ChatRequest(BaseModel):
     message: str = Field(..., description="User's message to the AI assistant")
     session_id: Optional[str] = Field(None, description="Session ID for maintaining conversation context")
-    user_id: Optional[str] = Field(None, description="User ID for personalization")
+    user_id: Optional[str] = Field(None, description="User ID (informational only - not authenticated, so never used to look up a profile)")
     user_context: Optional[str] = Field(None, description="Optional user context (balance, goals, etc.) for personalized responses")
+    context: Optional[UserContext] = Field(None, description="Changed profile fields, merged into the profile cached for session_id (used for this request only without one)")
+    include_usage: bool = Field(False, description="Include prompt/completion token counts for this request in the response")
+
+
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest] = Field(..., min_length=1, description="Chat requests to run (identical prompts are answered once)")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Upper bound on requests processed in parallel")
 
 
 class ChatResponse(BaseModel):
@@ -21,6 +42,7 @@ class ChatResponse(BaseModel):
     agent_used: str
     session_id: str
     timestamp: datetime
+    usage: Optional[Dict] = None
 
 
 class AgentType(BaseModel):
@@ -1,4 +1,24 @@
-from .vector_store import VectorStoreService, vector_store
+from .vector_store import VectorStoreService, get_vector_store
+from .metrics import MetricsRegistry, metrics
+from .hedging import HedgedLLM, maybe_hedge
+from .audit import AuditLog, audit_log
+from .deadlines import RequestCancelled, RequestDeadline
+from .model_policy import GenerationPlan, ModelPolicy, model_policy
+from .token_usage import TokenBudgetExceeded, TokenLedger, token_ledger
+from .user_context import UserContextCache, render_user_context, user_context_cache
+from .answer_cache import PrecomputedAnswers, precomputed_answers
 
-__all__ = ["VectorStoreService", "vector_store"]
+__all__ = ["VectorStoreService", "get_vector_store", "MetricsRegistry", "metrics", "HedgedLLM", "maybe_hedge",
+           "AuditLog", "audit_log",
+           "RequestCancelled", "RequestDeadline",
+           "GenerationPlan", "ModelPolicy", "model_policy",
+           "TokenBudgetExceeded", "TokenLedger", "token_ledger",
+           "UserContextCache", "render_user_context", "user_context_cache",
+           "PrecomputedAnswers", "precomputed_answers"]
 
+
+def __getattr__(name: str):
+    # `vector_store` is opened lazily - see vector_store.get_vector_store
+    if name == "vector_store":
+        return get_vector_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
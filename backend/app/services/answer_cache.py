@@ -0,0 +1,142 @@
+"""
+Precomputed answers for the fixed quick-question set
+Answers to canonical questions are generated at deploy time (see
+materialize_answers.py), stamped with the knowledge-base version and served
+from memory when a message matches exactly or after normalization
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+DOCUMENTS_DIR = BACKEND_DIR / "data" / "mock_documents"
+CANONICAL_QUESTIONS_PATH = Path(os.getenv("CANONICAL_QUESTIONS_PATH", str(BACKEND_DIR / "data" / "canonical_questions.json")))
+PRECOMPUTED_ANSWERS_PATH = Path(os.getenv("PRECOMPUTED_ANSWERS_PATH", str(BACKEND_DIR / "data" / "precomputed_answers.json")))
+PRECOMPUTED_ANSWERS = os.getenv("PRECOMPUTED_ANSWERS", "true").lower() == "true"
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^a-z0-9\s]", " ", text.lower()).split())
+
+
+def kb_version(documents_dir: Path = DOCUMENTS_DIR) -> str:
+    """Content hash of the knowledge-base documents the answers are built from"""
+    digest = hashlib.sha256()
+    for path in sorted(documents_dir.glob("*.txt")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def load_canonical_questions(path: Path = CANONICAL_QUESTIONS_PATH) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class PrecomputedAnswers:
+    """In-memory table of canonical answers, loaded from the materialized file"""
+
+    def __init__(self, path: Path = PRECOMPUTED_ANSWERS_PATH):
+        self.path = path
+        self.version: Optional[str] = None
+        self._answers: Dict[str, Tuple[str, str]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """(Re)load the table; a table built from other documents is ignored"""
+        answers: Dict[str, Tuple[str, str]] = {}
+        version = None
+        if PRECOMPUTED_ANSWERS and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+            current = kb_version()
+            if table.get("kb_version") == current:
+                version = current
+                for entry in table.get("answers", []):
+                    answers[normalize_question(entry["question"])] = (entry["answer"], entry["agent"])
+                print(f"✓ Loaded {len(answers)} precomputed answers (kb {version})")
+            else:
+                print(f"⚠️  Precomputed answers are stale (kb {table.get('kb_version')} != {current}) - run materialize_answers.py")
+
+        with self._lock:
+            self._answers = answers
+            self.version = version
+            self._loaded = True
+
+    def lookup(self, message: str, user_context: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """(answer, agent) for a canonical question, or None - always None with a user profile"""
+        if not self._loaded:
+            self.load()
+        if not self._answers:
+            return None
+        if user_context and user_context.strip():
+            # Stored answers were generated without a profile; personalized ones need the agents
+            metrics.increment("precomputed.skipped_context")
+            return None
+        hit = self._answers.get(normalize_question(message))
+        metrics.increment("precomputed.hit" if hit else "precomputed.miss")
+        return hit
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+
+def materialize_answers(questions: List[str], path: Path = PRECOMPUTED_ANSWERS_PATH) -> Dict:
+    """
+    Answer each canonical question through the full agent graph and write the table
+    Only answers from the specialist agents are kept: an error or a clarifying
+    question would be served to every user who asks
+    """
+    from ..agents.orchestrator import ROUTABLE_AGENTS, get_orchestrator
+
+    orchestrator = get_orchestrator()
+    if orchestrator.use_mock:
+        raise RuntimeError("Refusing to materialize answers in mock AI mode - set OPENAI_API_KEY")
+
+    answers = []
+    for question in questions:
+        # Budgets off: a trimmed answer would be baked into the table
+        answer, agent = orchestrator.process_message(question, session_id="materialize", enforce_budget=False)
+        if not set(agent.split(",")) <= set(ROUTABLE_AGENTS):
+            raise RuntimeError(f"Failed to answer {question!r} ({agent}): {answer}")
+        answers.append({"question": question, "answer": answer, "agent": agent})
+        print(f"  ✓ {question} ({agent}, {len(answer)} chars)")
+
+    table = {
+        "kb_version": kb_version(),
+        "generated_at": datetime.now().isoformat(),
+        "answers": answers,
+    }
+
+    # Write then rename so a running server never reads a half-written file
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return table
+
+
+def is_stale(path: Path = PRECOMPUTED_ANSWERS_PATH, questions: Optional[List[str]] = None) -> bool:
+    """True if the table is missing, was built from other documents, or covers other questions"""
+    if not path.exists():
+        return True
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    if table.get("kb_version") != kb_version():
+        return True
+    questions = questions if questions is not None else load_canonical_questions()
+    return [entry["question"] for entry in table.get("answers", [])] != questions
+
+
+# Global instance
+precomputed_answers = PrecomputedAnswers()
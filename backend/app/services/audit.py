@@ -0,0 +1,258 @@
+"""
+Conversation audit log for SmartFinance AI
+Every chat turn (request, routed agent, retrieved document IDs, response and
+timings) is queued in memory and written in batches by a background thread,
+to daily JSONL files or a SQLite table, so requests never wait on disk I/O.
+The queue is bounded; AUDIT_OVERFLOW decides what happens when it is full.
+close() (called from the app lifespan on shutdown) writes everything queued.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .metrics import metrics
+
+AUDIT_LOG = os.getenv("AUDIT_LOG", "jsonl").lower()  # jsonl | sqlite | off
+# Directory of daily chat_audit-YYYY-MM-DD.jsonl files, or the SQLite database file
+AUDIT_LOG_PATH = os.getenv("AUDIT_LOG_PATH", "./audit_logs")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))  # seconds a turn may wait for its batch
+# Full queue: "block" waits up to AUDIT_BLOCK_TIMEOUT seconds for space, then drops; "drop" drops at once
+AUDIT_OVERFLOW = os.getenv("AUDIT_OVERFLOW", "block").lower()
+AUDIT_BLOCK_TIMEOUT = float(os.getenv("AUDIT_BLOCK_TIMEOUT", "0.5"))
+
+FIELDS = ("timestamp", "session_id", "status", "agent", "message", "response",
+          "doc_ids", "elapsed_ms", "prompt_tokens", "completion_tokens", "precomputed")
+
+_STOP = object()
+
+
+def doc_id(metadata: Dict) -> str:
+    """Stable ID of an ingested chunk: source file and chunk index"""
+    return f"{metadata.get('source', 'unknown')}#{metadata.get('chunk_index', '?')}"
+
+
+class AuditTurn:
+    """What one chat turn collected on its way through the graph"""
+
+    def __init__(self, session_id: str, message: str):
+        self.session_id = session_id
+        self.message = message
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self.retrieved: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def add_retrieved(self, agent: str, doc_ids: List[str]):
+        with self._lock:
+            self.retrieved[agent] = doc_ids
+
+    def record(self, status: str, agent: str, response: str, usage: Optional[Dict] = None,
+               precomputed: bool = False) -> Dict:
+        """The audit record for this turn, keeping retrievals of the agents that answered"""
+        usage = usage or {}
+        agents = agent.split(",")
+        with self._lock:
+            doc_ids = [doc for name, docs in self.retrieved.items() if name in agents for doc in docs]
+        return {
+            "timestamp": self.timestamp,
+            "session_id": self.session_id,
+            "status": status,
+            "agent": agent,
+            "message": self.message,
+            "response": response,
+            "doc_ids": doc_ids,
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "precomputed": precomputed,
+        }
+
+
+# Set for the duration of one request, like the token usage collector;
+# speculative retrieval threads run in a copy of the router node's context
+_current_turn: ContextVar[Optional[AuditTurn]] = ContextVar("current_audit_turn", default=None)
+
+
+@contextmanager
+def audit_scope(session_id: str, message: str):
+    token = _current_turn.set(AuditTurn(session_id, message))
+    try:
+        yield _current_turn.get()
+    finally:
+        _current_turn.reset(token)
+
+
+def note_retrieved(agent: str, doc_ids: List[str]):
+    """Remember which chunks `agent` retrieved for the active request (no-op outside a request)"""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.add_retrieved(agent, doc_ids)
+
+
+class JsonlWriter:
+    """Appends records to one JSONL file per UTC day"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._day = None
+        self._file = None
+
+    def write(self, records: List[Dict]):
+        day = records[0]["timestamp"][:10]
+        if day != self._day:
+            self.close()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.directory / f"chat_audit-{day}.jsonl", "a", encoding="utf-8")
+            self._day = day
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteWriter:
+    """Inserts records into a chat_audit table, one transaction per batch"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Opened and used only by the writer thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS chat_audit (id INTEGER PRIMARY KEY, "
+            + ", ".join(FIELDS) + ")"
+        )
+        self.insert = f"INSERT INTO chat_audit ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})"
+
+    def write(self, records: List[Dict]):
+        rows = [tuple(json.dumps(record[field]) if field == "doc_ids" else record[field] for field in FIELDS)
+                for record in records]
+        with self.connection:
+            self.connection.executemany(self.insert, rows)
+
+    def close(self):
+        self.connection.close()
+
+
+class AuditLog:
+    """
+    Bounded queue of audit records drained in batches by one writer thread
+    submit() only enqueues; the thread starts on the first record
+    """
+
+    def __init__(self, backend: str = AUDIT_LOG, path: str = AUDIT_LOG_PATH,
+                 queue_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL, overflow: str = AUDIT_OVERFLOW):
+        self.backend = backend
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend in ("jsonl", "sqlite")
+
+    def submit(self, record: Dict) -> bool:
+        """Queue a record for writing; False if it was dropped"""
+        if not self.enabled or self._closed:
+            return False
+        if self._thread is None:
+            self._start()
+        try:
+            if self.overflow == "block":
+                self._queue.put(record, timeout=AUDIT_BLOCK_TIMEOUT)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("audit.dropped")
+            print(f"⚠️  Audit queue full, dropped turn for session {record.get('session_id')}")
+            return False
+        return True
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _open_writer(self):
+        if self.backend == "sqlite":
+            return SqliteWriter(self.path if self.path.endswith(".db") else os.path.join(self.path, "chat_audit.db"))
+        return JsonlWriter(self.path)
+
+    def _run(self):
+        writer = self._open_writer()
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            item = first
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(writer, batch)
+        writer.close()
+
+    def _write(self, writer, batch: List[Dict]):
+        start = time.perf_counter()
+        try:
+            writer.write(batch)
+        except Exception as e:
+            metrics.increment("audit.failed", len(batch))
+            print(f"❌ Audit log write failed ({len(batch)} turns): {type(e).__name__}: {e}")
+            return
+        metrics.increment("audit.written", len(batch))
+        metrics.observe("audit.batch_write", time.perf_counter() - start)
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting records and wait until everything queued has been written"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            return
+        # The sentinel goes behind every queued record, so they are all written first
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"⚠️  Audit writer did not finish within {timeout}s; {self._queue.qsize()} turns unwritten")
+        else:
+            print("✓ Audit log flushed")
+
+
+# Global instance
+audit_log = AuditLog()
+# Scripts that call process_message directly still get their turns written
+atexit.register(audit_log.close)
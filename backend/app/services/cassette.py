@@ -0,0 +1,236 @@
+"""
+Record/replay cassettes for LLM and embedding calls
+With LLM_CASSETTE=record every chat-model and embedding request is saved with
+its response and latency (and chunk timing for streamed calls); with
+LLM_CASSETTE=replay the same requests are answered from disk without touching
+the network, sleeping for the recorded latency times LLM_CASSETTE_LATENCY_SCALE.
+Requests are matched by a hash of the normalized request, so full-stack runs
+are deterministic and need no API access (OPENAI_API_KEY can be any value).
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from .metrics import metrics
+
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", "off").lower()  # off | record | replay
+LLM_CASSETTE_DIR = Path(os.getenv("LLM_CASSETTE_DIR", "./cassettes"))
+# Multiply recorded latencies on replay (0 = answer instantly)
+LLM_CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))
+
+# Per-call options that change between identical requests (the timeout is the request's remaining time)
+VOLATILE_KWARGS = {"timeout", "request_timeout"}
+
+
+class CassetteMiss(KeyError):
+    """Raised on replay when a request was never recorded"""
+
+    def __init__(self, cassette: str, key: str):
+        super().__init__(f"No recording for request {key} in cassette '{cassette}' - re-record with LLM_CASSETTE=record")
+
+
+class Cassette:
+    """
+    One append-only JSONL file of recorded calls (one line per call)
+    A request recorded several times is replayed in recorded order, cycling
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.stem
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = {}
+        self._served: Dict[str, int] = {}
+        self._file = None
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, key: str) -> Dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                metrics.increment("cassette.miss")
+                raise CassetteMiss(self.name, key)
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        metrics.increment("cassette.replayed")
+        return entries[served % len(entries)]
+
+    def append(self, key: str, entry: Dict):
+        entry = {"key": key, **entry}
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+        metrics.increment("cassette.recorded")
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(name: str) -> Cassette:
+    """The shared cassette for `name`, loaded from LLM_CASSETTE_DIR on first use"""
+    with _cassettes_lock:
+        if name not in _cassettes:
+            _cassettes[name] = Cassette(LLM_CASSETTE_DIR / f"{name}.jsonl")
+        return _cassettes[name]
+
+
+def request_key(*parts: Any) -> str:
+    """Stable hash of a normalized request"""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:24]
+
+
+def _normalize_content(content: Any) -> Any:
+    # Whitespace-only differences (prompt indentation, trailing newlines) are the same request
+    if isinstance(content, str):
+        return " ".join(content.split())
+    return content
+
+
+def _normalize_messages(input: Any) -> List:
+    if isinstance(input, str):
+        return [["human", _normalize_content(input)]]
+    return [[message.type, _normalize_content(message.content)] if isinstance(message, BaseMessage)
+            else [str(message)] for message in input]
+
+
+def _model_name(model: Any) -> Optional[str]:
+    return getattr(model, "model_name", None) or getattr(model, "model_id", None) or getattr(model, "model", None)
+
+
+def _replay_sleep(seconds: float):
+    if LLM_CASSETTE_LATENCY_SCALE > 0 and seconds > 0:
+        time.sleep(seconds * LLM_CASSETTE_LATENCY_SCALE)
+
+
+class CassetteLLM:
+    """
+    Drop-in wrapper around a chat model's `invoke` and `stream` that records
+    or replays them; everything else is delegated to the wrapped model
+    """
+
+    def __init__(self, llm: Any, name: str, mode: str):
+        self.llm = llm
+        self.name = name
+        self.mode = mode
+        self.cassette = get_cassette(name)
+
+    def __getattr__(self, item):
+        return getattr(self.llm, item)
+
+    def _key(self, kind: str, input: Any, kwargs: Dict) -> str:
+        options = {k: v for k, v in kwargs.items() if k not in VOLATILE_KWARGS}
+        return request_key(kind, _model_name(self.llm), _normalize_messages(input), options)
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs) -> Any:
+        key = self._key("invoke", input, kwargs)
+        if self.mode == "replay":
+            entry = self.cassette.lookup(key)
+            _replay_sleep(entry["latency_ms"] / 1000)
+            return messages_from_dict([entry["response"]])[0]
+
+        start = time.perf_counter()
+        response = self.llm.invoke(input, config, **kwargs)
+        self.cassette.append(key, {
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "response": message_to_dict(response),
+        })
+        return response
+
+    def stream(self, input: Any, config: Optional[Any] = None, **kwargs) -> Iterator[Any]:
+        key = self._key("stream", input, kwargs)
+        if self.mode == "replay":
+            entry = self.cassette.lookup(key)
+            start = time.perf_counter()
+            for offset_ms, chunk in entry["chunks"]:
+                # Keep the recorded gaps between chunks, not just the total
+                _replay_sleep(offset_ms / 1000 - (time.perf_counter() - start) / max(LLM_CASSETTE_LATENCY_SCALE, 1e-9))
+                yield messages_from_dict([chunk])[0]
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        for chunk in self.llm.stream(input, config, **kwargs):
+            chunks.append([round((time.perf_counter() - start) * 1000, 1), message_to_dict(chunk)])
+            yield chunk
+        self.cassette.append(key, {"latency_ms": chunks[-1][0] if chunks else 0.0, "chunks": chunks})
+
+
+def _pack_vector(vector: List[float]) -> str:
+    # float32 + base64 is ~4x smaller than a JSON list of floats
+    return base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+
+
+def _unpack_vector(packed: str) -> List[float]:
+    return array("f", base64.b64decode(packed)).tolist()
+
+
+class CassetteEmbeddings(Embeddings):
+    """Embeddings client that records or replays embed_query / embed_documents"""
+
+    def __init__(self, embeddings: Embeddings, name: str, mode: str):
+        self.embeddings = embeddings
+        self.mode = mode
+        self.cassette = get_cassette(name)
+
+    def __getattr__(self, item):
+        return getattr(self.embeddings, item)
+
+    def _call(self, kind: str, texts: List[str], embed) -> List[List[float]]:
+        key = request_key(kind, _model_name(self.embeddings), texts)
+        if self.mode == "replay":
+            entry = self.cassette.lookup(key)
+            _replay_sleep(entry["latency_ms"] / 1000)
+            return [_unpack_vector(vector) for vector in entry["vectors"]]
+
+        start = time.perf_counter()
+        vectors = embed()
+        self.cassette.append(key, {
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "vectors": [_pack_vector(vector) for vector in vectors],
+        })
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._call("documents", texts, lambda: self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call("query", [text], lambda: [self.embeddings.embed_query(text)])[0]
+
+
+def with_cassette(llm: Any, name: str) -> Any:
+    """Wrap a chat model in a CassetteLLM when LLM_CASSETTE is record or replay, otherwise return it unchanged"""
+    if LLM_CASSETTE not in ("record", "replay") or llm is None:
+        return llm
+    return CassetteLLM(llm, name=name, mode=LLM_CASSETTE)
+
+
+def with_embedding_cassette(embeddings: Embeddings, name: str = "embeddings") -> Embeddings:
+    """Wrap an embeddings client in a CassetteEmbeddings when LLM_CASSETTE is record or replay"""
+    if LLM_CASSETTE not in ("record", "replay"):
+        return embeddings
+    return CassetteEmbeddings(embeddings, name=name, mode=LLM_CASSETTE)
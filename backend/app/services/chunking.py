@@ -0,0 +1,180 @@
+"""
+Structure-aware chunking and near-duplicate removal for ingestion
+Documents are split at their headings (ALL-CAPS section titles, numbered
+section titles, markdown headings). Whole sections are packed into chunks up
+to a token limit with no overlap; only a section larger than the limit is
+split, at paragraph boundaries, and each part repeats its section title.
+Near-identical chunks are dropped using MinHash signatures over word shingles.
+"""
+
+import os
+import re
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from .token_usage import count_tokens
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "300"))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "40"))
+CHUNK_DEDUP_THRESHOLD = float(os.getenv("CHUNK_DEDUP_THRESHOLD", "0.8"))  # estimated Jaccard similarity
+
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+\S")
+_NUMBERED_HEADING = re.compile(r"^\d+\.\s+[A-Z0-9][A-Z0-9 &/,'()-]+$")
+
+
+def is_heading(line: str) -> bool:
+    """Section title: markdown heading, or a short ALL-CAPS line (optionally numbered)"""
+    line = line.strip()
+    if not line or len(line) > 80:
+        return False
+    if _MARKDOWN_HEADING.match(line) or _NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters) and not line.endswith((".", ","))
+
+
+class StructuredChunker:
+    """Split documents along their section structure with token-based limits"""
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, min_tokens: int = CHUNK_MIN_TOKENS):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    def sections(self, text: str) -> List[Dict]:
+        """[{"heading", "blocks"}] where blocks are blank-line separated paragraphs"""
+        sections = [{"heading": "", "blocks": []}]
+        block: List[str] = []
+
+        def flush():
+            if block:
+                sections[-1]["blocks"].append("\n".join(block))
+                block.clear()
+
+        for line in text.splitlines():
+            if is_heading(line):
+                flush()
+                sections.append({"heading": line.strip().lstrip("#").strip(), "blocks": []})
+            elif not line.strip():
+                flush()
+            else:
+                block.append(line.rstrip())
+        flush()
+        return [section for section in sections if section["blocks"]]
+
+    def _split_block(self, block: str) -> List[str]:
+        """Break a block larger than max_tokens at line, then word, boundaries"""
+        pieces, current = [], []
+        for line in block.split("\n"):
+            words = line.split(" ")
+            if count_tokens(line) > self.max_tokens:
+                # A single enormous line - fall back to word windows
+                for start in range(0, len(words), self.max_tokens // 2):
+                    pieces.append(" ".join(words[start:start + self.max_tokens // 2]))
+                continue
+            if current and count_tokens("\n".join(current + [line])) > self.max_tokens:
+                pieces.append("\n".join(current))
+                current = []
+            current.append(line)
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    def _section_chunks(self, heading: str, blocks: List[str]) -> List[str]:
+        """Pack one section's paragraphs into chunks, each starting with the heading"""
+        prefix = f"{heading}\n" if heading else ""
+        budget = self.max_tokens - count_tokens(prefix)
+
+        pieces = []
+        for block in blocks:
+            pieces.extend(self._split_block(block) if count_tokens(block) > budget else [block])
+
+        chunks, current = [], []
+        for piece in pieces:
+            if current and count_tokens("\n\n".join(current + [piece])) > budget:
+                chunks.append(current)
+                current = []
+            current.append(piece)
+        if current:
+            # Fold a tiny tail into the previous chunk rather than storing it alone
+            tail = "\n\n".join(current)
+            if chunks and count_tokens(tail) < self.min_tokens and \
+                    count_tokens("\n\n".join(chunks[-1] + current)) <= budget + self.min_tokens:
+                chunks[-1].extend(current)
+            else:
+                chunks.append(current)
+        return [prefix + "\n\n".join(chunk) for chunk in chunks]
+
+    def split(self, text: str) -> List[Dict]:
+        """
+        Chunks as {"text", "section"} dicts. Sections are never split unless
+        they exceed max_tokens; consecutive small sections share a chunk.
+        """
+        chunks: List[Dict] = []
+        current: List[str] = []
+        current_sections: List[str] = []
+
+        def flush():
+            if current:
+                chunks.append({"text": "\n\n".join(current), "section": " | ".join(current_sections)})
+                current.clear()
+                current_sections.clear()
+
+        for section in self.sections(text):
+            heading = section["heading"]
+            section_chunks = self._section_chunks(heading, section["blocks"])
+            if len(section_chunks) > 1:
+                flush()
+                chunks.extend({"text": chunk, "section": heading} for chunk in section_chunks)
+                continue
+            if current and count_tokens("\n\n".join(current + section_chunks)) > self.max_tokens:
+                flush()
+            current.append(section_chunks[0])
+            current_sections.append(heading)
+        flush()
+        return chunks
+
+
+class MinHashDeduplicator:
+    """
+    Drops chunks whose estimated Jaccard similarity (over word shingles) to an
+    already accepted chunk reaches the threshold
+    """
+
+    _PRIME = 4294967291  # largest prime below 2**32
+
+    def __init__(self, threshold: float = CHUNK_DEDUP_THRESHOLD, num_perm: int = 64, shingle_words: int = 5, seed: int = 7):
+        self.threshold = threshold
+        self.shingle_words = shingle_words
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self._PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, self._PRIME, num_perm, dtype=np.uint64)
+        self._signatures: List[np.ndarray] = []
+        self.dropped = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        words = re.findall(r"\w+", text.lower())
+        size = self.shingle_words
+        shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p per permutation; every term stays below 2**64
+        return ((np.outer(hashes, self._a) + self._b) % self._PRIME).min(axis=0)
+
+    def similarity(self, signature: np.ndarray) -> float:
+        """Highest estimated similarity to an accepted chunk"""
+        if not self._signatures:
+            return 0.0
+        return float((np.vstack(self._signatures) == signature).mean(axis=1).max())
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check a chunk and remember it if it is new"""
+        signature = self.signature(text)
+        if self.similarity(signature) >= self.threshold:
+            self.dropped += 1
+            return True
+        self._signatures.append(signature)
+        return False
+
+    def filter(self, chunks: List[Dict], key: str = "text") -> List[Dict]:
+        return [chunk for chunk in chunks if not self.is_duplicate(chunk[key])]
@@ -0,0 +1,66 @@
+"""
+Collection aliases for blue/green re-indexing
+Agents query logical collection names (billing_documents, ...). Ingestion
+builds each new version into a physical collection such as
+billing_documents__20261019T101500-3fa2c1 and then repoints the alias. The aliases
+live in one small JSON file next to the Chroma data that is replaced
+atomically, so a reader sees either the old or the new mapping, never a mix.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+VERSION_SEPARATOR = "__"
+
+
+def versioned_name(collection_name: str, version: str) -> str:
+    """Physical collection name for one ingestion version"""
+    return f"{collection_name}{VERSION_SEPARATOR}{version}"
+
+
+class CollectionAliases:
+    """Logical -> physical collection mapping, re-read whenever the file changes"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._aliases: Dict[str, str] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._aliases, self._stamp = {}, None
+            return
+        # os.replace gives every version a new inode, so this also catches
+        # two swaps within the filesystem's timestamp resolution
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp != self._stamp:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._aliases = json.load(f)
+            self._stamp = stamp
+
+    def resolve(self, collection_name: str) -> str:
+        """Physical collection currently serving a logical name (the name itself if never aliased)"""
+        self._refresh()
+        return self._aliases.get(collection_name, collection_name)
+
+    def all(self) -> Dict[str, str]:
+        self._refresh()
+        return dict(self._aliases)
+
+    def swap(self, updates: Dict[str, str]):
+        """Point several aliases at new collections in one atomic file replace"""
+        with self._lock:
+            self._refresh()
+            aliases = {**self._aliases, **updates}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            staging = self.path.with_name(f".{self.path.name}.tmp")
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump(aliases, f, indent=2)
+            os.replace(staging, self.path)
+            self._refresh()
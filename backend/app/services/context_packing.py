@@ -0,0 +1,115 @@
+"""
+Context packing for retrieved documents
+Reranks retrieval candidates by maximal marginal relevance (MMR) using their
+stored embeddings, drops sentences already covered by a better-ranked
+document, and fills a fixed token budget in that order so prompt size no
+longer depends on how long the retrieved chunks happen to be
+"""
+
+import os
+import re
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .token_usage import count_tokens
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "500"))
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "8"))  # retrieved before reranking
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.9"))  # 1 = relevance only, 0 = diversity only
+
+# Sentences end at ./!/? followed by whitespace, or at a line break (lists, Q/A lines)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+_MIN_FRAGMENT_TOKENS = 30
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def mmr_order(query_vector: Sequence[float], vectors: np.ndarray, lambda_mult: float = CONTEXT_MMR_LAMBDA) -> List[int]:
+    """Candidate indexes in MMR order: relevant to the query, unlike what is already picked"""
+    if len(vectors) == 0:
+        return []
+    vectors = _unit(np.asarray(vectors, dtype=np.float32))
+    query = _unit(np.asarray(query_vector, dtype=np.float32))
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    order = [int(np.argmax(relevance))]
+    remaining = set(range(len(vectors))) - set(order)
+    while remaining:
+        candidates = np.fromiter(remaining, dtype=int)
+        redundancy = similarity[np.ix_(candidates, order)].max(axis=1)
+        scores = lambda_mult * relevance[candidates] - (1 - lambda_mult) * redundancy
+        best = int(candidates[np.argmax(scores)])
+        order.append(best)
+        remaining.remove(best)
+    return order
+
+
+def _sentence_key(sentence: str) -> frozenset:
+    return frozenset(re.findall(r"\w+", sentence.lower()))
+
+
+class ContextPacker:
+    """Turns retrieval candidates into a deduplicated, budget-bounded context"""
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, lambda_mult: float = CONTEXT_MMR_LAMBDA,
+                 sentence_overlap: float = 0.8):
+        self.token_budget = token_budget
+        self.lambda_mult = lambda_mult
+        self.sentence_overlap = sentence_overlap
+
+    def _is_redundant(self, key: frozenset, seen: List[frozenset]) -> bool:
+        if not key:
+            return False
+        for other in seen:
+            if len(key & other) / len(key | other) >= self.sentence_overlap:
+                return True
+        return False
+
+    def pack(self, query_vector: Sequence[float], candidates: List[Dict], token_budget: int = None) -> List[str]:
+        """
+        candidates are {"text", "vector", ...} dicts from VectorStoreService.query_candidates
+        Returns document texts in MMR order whose total stays within the budget
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        if not candidates:
+            return []
+        vectors = np.vstack([candidate["vector"] for candidate in candidates])
+
+        packed, seen, used = [], [], 0
+        for index in mmr_order(query_vector, vectors, self.lambda_mult):
+            kept = []
+            for sentence in _SENTENCE_BREAK.split(candidates[index]["text"]):
+                key = _sentence_key(sentence)
+                if sentence.strip() and not self._is_redundant(key, seen):
+                    kept.append(sentence.strip())
+                    seen.append(key)
+            if not kept:
+                continue
+
+            text = "\n".join(kept)
+            tokens = count_tokens(text)
+            if used + tokens > budget:
+                # Take the leading sentences that still fit, then stop
+                fragment, fragment_tokens = [], 0
+                for sentence in kept:
+                    sentence_tokens = count_tokens(sentence) + 1
+                    if used + fragment_tokens + sentence_tokens > budget:
+                        break
+                    fragment.append(sentence)
+                    fragment_tokens += sentence_tokens
+                if fragment and fragment_tokens >= _MIN_FRAGMENT_TOKENS:
+                    packed.append("\n".join(fragment))
+                break
+            packed.append(text)
+            used += tokens
+        return packed
+
+
+# Global instance
+context_packer = ContextPacker()
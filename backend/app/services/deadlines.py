@@ -0,0 +1,112 @@
+"""
+Request deadlines and cancellation for SmartFinance AI
+The HTTP layer creates a RequestDeadline per chat turn and cancels it when the
+client disconnects; the worker thread checks it before routing, retrieval and
+each LLM call, and LLM calls get the remaining time as their timeout
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .metrics import metrics
+
+# End-to-end budget for one chat turn (seconds) - below the frontend's 60 s abort
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "55"))
+# Never give an LLM call less than this, so a nearly-spent deadline fails fast instead of mid-request
+MIN_CALL_TIMEOUT = 1.0
+
+
+class RequestCancelled(Exception):
+    """Raised in the worker when its request was cancelled or ran out of time"""
+
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"Request {reason} before {stage}")
+        self.reason = reason
+        self.stage = stage
+
+
+class RequestDeadline:
+    """Deadline plus cancellation flag shared by the event loop and the worker thread"""
+
+    def __init__(self, timeout: Optional[float] = REQUEST_TIMEOUT):
+        self.expires_at = time.monotonic() + timeout if timeout else None
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason: str):
+        """Stop the request at its next checkpoint ("client" or "deadline")"""
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled.is_set() and self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.cancel("deadline")
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, stage: str):
+        """Raise RequestCancelled instead of starting `stage` if the request is no longer wanted"""
+        if self.cancelled:
+            metrics.increment(f"work.skipped.{stage}")
+            raise RequestCancelled(self.reason, stage)
+
+
+# Set in the executor thread for the duration of one request; graph nodes run
+# in threads that copy the caller's context, like the token usage collector
+_current_deadline: ContextVar[Optional[RequestDeadline]] = ContextVar("current_deadline", default=None)
+
+
+def current_deadline() -> Optional[RequestDeadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[RequestDeadline]):
+    """Make `deadline` the active one for this thread's request"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_deadline(stage: str):
+    """Checkpoint for the active request (no-op outside a request)"""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def check_retry(stage: str):
+    """
+    Checkpoint before retrying a failed call (no-op outside a request)
+    Also stops when less than MIN_CALL_TIMEOUT is left: the retry would run
+    past the deadline, and a timeout caused by the deadline would be paid twice
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return
+    remaining = deadline.remaining()
+    if remaining is not None and remaining < MIN_CALL_TIMEOUT:
+        deadline.cancel("deadline")
+    deadline.check(stage)
+
+
+def call_timeout_kwargs() -> Dict[str, float]:
+    """invoke() kwargs bounding an OpenAI call by the active request's remaining time"""
+    deadline = _current_deadline.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return {}
+    return {"timeout": max(MIN_CALL_TIMEOUT, remaining)}
@@ -0,0 +1,135 @@
+"""
+Hedged LLM requests for SmartFinance AI
+Fires a backup request when the first attempt is slower than the recent p95,
+takes whichever finishes first and keeps extra requests under a budget
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Optional
+
+from .metrics import metrics
+
+HEDGING_ENABLED = os.getenv("LLM_HEDGING", "false").lower() == "true"
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))  # max extra requests (5%)
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "5.0"))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Both attempts run here so the caller can wait on whichever finishes first
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_HEDGE_POOL_SIZE", "32")),
+    thread_name_prefix="llm-hedge"
+)
+
+
+class HedgeBudget:
+    """
+    Token bucket that earns `ratio` credits per request and spends one per hedge,
+    so hedges never exceed ratio * requests (plus a small burst allowance)
+    """
+
+    def __init__(self, ratio: float, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.credits = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.credits = min(self.burst, self.credits + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.credits >= 1.0:
+                self.credits -= 1.0
+                return True
+            return False
+
+
+# Shared across every hedged model so the cap applies to total LLM traffic
+hedge_budget = HedgeBudget(HEDGE_BUDGET)
+
+
+class HedgedLLM:
+    """
+    Drop-in wrapper around a LangChain chat model's `invoke`
+
+    If the primary attempt has not returned after the adaptive delay (rolling
+    p95 latency for this name), a second attempt is sent to `alternate` (or the
+    same model). The first successful result wins. The loser is cancelled if it
+    has not started yet, otherwise its result is discarded when it completes.
+    """
+
+    def __init__(self, primary: Any, name: str, alternate: Optional[Any] = None,
+                 budget: HedgeBudget = hedge_budget):
+        self.primary = primary
+        self.alternate = alternate or primary
+        self.name = name
+        self.budget = budget
+        self.latency_metric = f"llm.latency.{name}"
+
+    def __getattr__(self, item):
+        # Delegate everything else (model_name, bind, etc.) to the wrapped model
+        return getattr(self.primary, item)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait before firing the hedge"""
+        if metrics.count(self.latency_metric) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, metrics.percentile(self.latency_metric, HEDGE_PERCENTILE))
+
+    def _observe_primary(self, future, start: float):
+        if not future.cancelled() and future.exception() is None:
+            metrics.observe(self.latency_metric, time.perf_counter() - start)
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs) -> Any:
+        self.budget.record_request()
+        start = time.perf_counter()
+
+        # Each attempt runs in its own copy of the caller's context, so the request's
+        # deadline, token usage, audit turn and tracing context follow it into the pool
+        primary_future = _hedge_executor.submit(
+            contextvars.copy_context().run, self.primary.invoke, input, config, **kwargs
+        )
+        # The hedge delay comes from the primary's own latency, recorded even when
+        # a hedge wins - the winner's latency would make the delay keep shrinking
+        primary_future.add_done_callback(lambda future: self._observe_primary(future, start))
+        done, _ = wait([primary_future], timeout=self.hedge_delay())
+        if done or not self.budget.try_spend():
+            if not done:
+                metrics.increment("llm.hedge.skipped_budget")
+            return primary_future.result()
+
+        print(f"[Hedge] {self.name}: no response after {time.perf_counter() - start:.2f}s, firing backup request")
+        metrics.increment("llm.hedge.fired")
+        hedge_future = _hedge_executor.submit(
+            contextvars.copy_context().run, self.alternate.invoke, input, config, **kwargs
+        )
+
+        pending = {primary_future, hedge_future}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    first_error = first_error or future.exception()
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge_future:
+                    metrics.increment("llm.hedge.won")
+                return future.result()
+
+        raise first_error
+
+
+def maybe_hedge(llm: Any, name: str, alternate: Optional[Any] = None) -> Any:
+    """Wrap llm in a HedgedLLM when LLM_HEDGING is enabled, otherwise return it unchanged"""
+    if not HEDGING_ENABLED or llm is None:
+        return llm
+    return HedgedLLM(llm, name=name, alternate=alternate)
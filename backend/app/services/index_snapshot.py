@@ -0,0 +1,146 @@
+"""
+Memory-mapped vector index snapshots
+ingest_data.py exports every collection into an immutable snapshot directory:
+
+    {VECTOR_SNAPSHOT_DIR}/
+        CURRENT                          name of the live snapshot
+        snapshots/{version}/manifest.json
+        snapshots/{version}/{collection}/vectors.npy   normalized rows (+ scales.npy for int8)
+        snapshots/{version}/{collection}/offsets.npy   byte offsets into texts.bin
+        snapshots/{version}/{collection}/texts.bin     UTF-8 texts back to back
+        snapshots/{version}/{collection}/metadata.json  per-row metadata
+
+Serving workers open it read-only with mmap, so every worker shares one copy
+in the page cache. CURRENT is replaced atomically, and workers pick up a new
+snapshot without a restart.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .numpy_index import NumpyIndex
+
+VECTOR_SNAPSHOT_DIR = Path(os.getenv("VECTOR_SNAPSHOT_DIR", "./vector_snapshots"))
+VECTOR_SNAPSHOT_KEEP = int(os.getenv("VECTOR_SNAPSHOT_KEEP", "2"))
+
+CollectionData = Tuple[np.ndarray, List[str], List[Dict]]
+
+
+class TextBlob:
+    """Texts stored back to back in one UTF-8 file and read through mmap"""
+
+    def __init__(self, path: Path, offsets: np.ndarray):
+        self.offsets = offsets
+        self._mmap = None
+        if os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self._mmap[start:end].decode("utf-8") if self._mmap is not None else ""
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[row] for row in range(len(self)))
+
+
+def _write_collection(directory: Path, index: NumpyIndex):
+    directory.mkdir(parents=True)
+    np.save(directory / "vectors.npy", index.matrix)
+    if index.dtype == "int8":
+        np.save(directory / "scales.npy", index.scales)
+
+    encoded = [text.encode("utf-8") for text in index.texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(blob) for blob in encoded], out=offsets[1:])
+    np.save(directory / "offsets.npy", offsets)
+    with open(directory / "texts.bin", "wb") as f:
+        for blob in encoded:
+            f.write(blob)
+    with open(directory / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump(index.metadatas, f, ensure_ascii=False)
+
+
+def _open_collection(directory: Path, dtype: str) -> NumpyIndex:
+    matrix = np.load(directory / "vectors.npy", mmap_mode="r")
+    scales = np.load(directory / "scales.npy", mmap_mode="r") if dtype == "int8" else np.empty(0, dtype=np.float32)
+    offsets = np.load(directory / "offsets.npy", mmap_mode="r")
+    with open(directory / "metadata.json", "r", encoding="utf-8") as f:
+        metadatas = json.load(f)
+    return NumpyIndex.from_arrays(matrix, scales, TextBlob(directory / "texts.bin", offsets), metadatas, dtype)
+
+
+def write_snapshot(collections: Dict[str, CollectionData], dtype: str = "float32",
+                   base_dir: Path = VECTOR_SNAPSHOT_DIR) -> str:
+    """Write a new snapshot, point CURRENT at it and prune old snapshots"""
+    version = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    snapshots_dir = base_dir / "snapshots"
+    staging = snapshots_dir / f".{version}.tmp"
+    staging.mkdir(parents=True)
+
+    manifest = {"version": version, "created_at": datetime.now().isoformat(), "dtype": dtype, "collections": {}}
+    for name, (vectors, texts, metadatas) in collections.items():
+        index = NumpyIndex(len(vectors[0]) if len(vectors) else 0, dtype)
+        index.add(vectors, texts, metadatas)
+        _write_collection(staging / name, index)
+        manifest["collections"][name] = {"count": len(index), "dimension": index.dimension}
+    with open(staging / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Publish: the directory rename and the CURRENT swap are both atomic
+    os.replace(staging, snapshots_dir / version)
+    pointer = base_dir / ".CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, base_dir / "CURRENT")
+
+    prune_snapshots(base_dir)
+    return version
+
+
+def prune_snapshots(base_dir: Path = VECTOR_SNAPSHOT_DIR, keep: int = VECTOR_SNAPSHOT_KEEP):
+    """
+    Delete all but the newest snapshots (never the live one). Workers still
+    mapping a deleted snapshot keep reading it until they swap.
+    """
+    current = current_version(base_dir)
+    versions = sorted(path.name for path in (base_dir / "snapshots").iterdir() if not path.name.startswith("."))
+    for version in versions[:-keep] if keep > 0 else versions:
+        if version != current:
+            shutil.rmtree(base_dir / "snapshots" / version, ignore_errors=True)
+
+
+def current_version(base_dir: Path = VECTOR_SNAPSHOT_DIR) -> Optional[str]:
+    try:
+        return (base_dir / "CURRENT").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_snapshot(version: str, base_dir: Path = VECTOR_SNAPSHOT_DIR) -> Dict[str, NumpyIndex]:
+    """Map every collection of a snapshot read-only (no vectors are copied)"""
+    directory = base_dir / "snapshots" / version
+    with open(directory / "manifest.json", "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return {name: _open_collection(directory / name, manifest["dtype"]) for name in manifest["collections"]}
+
+
+def export_chroma_collections(client, collection_names: List[str]) -> Dict[str, CollectionData]:
+    """Read stored embeddings, texts and metadata out of Chroma"""
+    collections = {}
+    for name in collection_names:
+        data = client.get_or_create_collection(name).get(include=["embeddings", "documents", "metadatas"])
+        embeddings = data.get("embeddings")
+        vectors = np.asarray(embeddings if embeddings is not None else [], dtype=np.float32)
+        collections[name] = (vectors, list(data["documents"] or []), list(data["metadatas"] or []))
+    return collections
@@ -0,0 +1,368 @@
+"""
+Knowledge-base ingestion with blue/green collection swaps
+Every run builds a complete new version of each collection under a versioned
+name, then repoints the collection aliases in one atomic step (see
+collection_aliases.py), writes a fresh index snapshot for numpy-engine
+workers and drops versions older than INGEST_KEEP_VERSIONS. Queries keep
+hitting the previous version until the swap, so they never see a
+half-written collection.
+
+Runs from the command line (ingest_data.py) or as a background job started
+through the admin API (IngestionJobManager). Jobs chunk and embed in a
+separate process, so that work never competes with request handling for the
+GIL; the batches come back to the server, which writes them through its own
+Chroma client (a second client on the same directory would fight it over the
+SQLite file and keep stale in-memory indexes).
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .chunking import MinHashDeduplicator, StructuredChunker
+from .collection_aliases import VERSION_SEPARATOR, versioned_name
+
+DOCUMENTS_DIR = Path(__file__).resolve().parents[2] / "data" / "mock_documents"
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "32"))  # chunks per embedding request
+INGEST_KEEP_VERSIONS = int(os.getenv("INGEST_KEEP_VERSIONS", "2"))  # live version + rollback
+INGEST_NICE = int(os.getenv("INGEST_NICE", "10"))  # CPU priority decrease for background jobs
+
+# collection -> [(file, doc_type)]
+COLLECTION_SOURCES = {
+    "billing_documents": [("billing_policies.txt", "billing")],
+    "technical_documents": [("technical_faqs.txt", "technical"), ("savings_and_goals.txt", "financial_planning")],
+    "policy_documents": [("fraud_prevention.txt", "policy")],
+}
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class IngestionInProgress(RuntimeError):
+    """Raised when an ingestion job is started while another one is running"""
+
+
+class DataIngestionPipeline:
+    """Pipeline for ingesting financial documents into vector database"""
+
+    def __init__(self, documents_dir: Path = DOCUMENTS_DIR, batch_size: int = INGEST_BATCH_SIZE):
+        # Chunks follow the documents' section headings, capped by tokens, with no overlap
+        self.chunker = StructuredChunker()
+        self.documents_dir = Path(documents_dir)
+        self.batch_size = batch_size
+
+    def load_document(self, file_path: Path) -> str:
+        """Load text content from a file"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def chunk_document(self, text: str, source: str, doc_type: str) -> List[Dict]:
+        """Split document into chunks with metadata"""
+        chunks = self.chunker.split(text)
+
+        return [
+            {
+                "text": chunk["text"],
+                "metadata": {
+                    "source": source,
+                    "type": doc_type,
+                    "section": chunk["section"],
+                    "chunk_index": idx
+                }
+            }
+            for idx, chunk in enumerate(chunks)
+        ]
+
+    def deduplicate(self, chunks: List[Dict]) -> List[Dict]:
+        """Drop near-identical chunks across the files of one collection"""
+        deduplicator = MinHashDeduplicator()
+        unique = deduplicator.filter(chunks)
+        if deduplicator.dropped:
+            print(f"  Removed {deduplicator.dropped} near-duplicate chunks")
+        return unique
+
+    def build_chunks(self) -> Dict[str, List[Dict]]:
+        """Chunk every source document, grouped by collection"""
+        if not self.documents_dir.exists():
+            raise FileNotFoundError(f"Documents directory not found: {self.documents_dir}")
+        collections = {}
+        for collection_name, sources in COLLECTION_SOURCES.items():
+            chunks = []
+            for filename, doc_type in sources:
+                content = self.load_document(self.documents_dir / filename)
+                chunks.extend(self.chunk_document(text=content, source=filename, doc_type=doc_type))
+            collections[collection_name] = self.deduplicate(chunks)
+        return collections
+
+    def run(self, store, progress: Optional[ProgressCallback] = None) -> str:
+        """Build and publish a new version, then drop old ones. Returns the live version."""
+        version, shadows = self.build(store, progress)
+        self.publish(store, version, shadows)
+        self.collect_garbage(store)
+        return version
+
+    def embed_batches(self, embeddings, progress: Optional[ProgressCallback] = None) -> Iterator[Tuple[str, List[Dict], List[List[float]]]]:
+        """
+        Chunk every document and embed the chunks in batches.
+        Yields (collection, chunks, vectors); progress(stage, done, total) is called as chunks are embedded.
+        """
+        progress = progress or (lambda stage, done, total: None)
+        progress("chunking", 0, 0)
+        collections = self.build_chunks()
+        total = sum(len(chunks) for chunks in collections.values())
+
+        done = 0
+        for collection_name, chunks in collections.items():
+            for start in range(0, len(chunks), self.batch_size):
+                batch = chunks[start:start + self.batch_size]
+                vectors = embeddings.embed_documents([chunk["text"] for chunk in batch])
+                done += len(batch)
+                yield collection_name, batch, vectors
+                progress("embedding", done, total)
+
+    def build(self, store, progress: Optional[ProgressCallback] = None,
+              batches: Optional[Iterator[Tuple[str, List[Dict], List[List[float]]]]] = None) -> Tuple[str, Dict[str, str]]:
+        """
+        Build a new version of every collection and its index snapshot.
+        Writes `batches` (embed_batches output, by default computed here with the store's embeddings).
+        Returns the version and the {collection: shadow collection} it built.
+        """
+        progress = progress or (lambda stage, done, total: None)
+        if batches is None:
+            batches = self.embed_batches(store.embeddings, progress)
+        version = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+        # Blue/green: write into shadow collections nobody is reading yet
+        shadows = {}
+        counts: Dict[str, int] = {}
+        for collection_name, batch, vectors in batches:
+            if collection_name not in shadows:
+                shadows[collection_name] = versioned_name(collection_name, version)
+            target = store.client.get_or_create_collection(shadows[collection_name])
+            texts = [chunk["text"] for chunk in batch]
+            target.add(
+                ids=[str(uuid.uuid4()) for _ in batch],
+                embeddings=vectors,
+                documents=texts,
+                metadatas=[chunk["metadata"] for chunk in batch]
+            )
+            counts[collection_name] = counts.get(collection_name, 0) + len(batch)
+        for collection_name, shadow in shadows.items():
+            print(f"  Built {shadow} ({counts[collection_name]} chunks)")
+
+        progress("snapshot", sum(counts.values()), sum(counts.values()))
+        self.write_index_snapshot(store, shadows)
+        return version, shadows
+
+    def publish(self, store, version: str, shadows: Dict[str, str]):
+        """Load the new collections into this process's Chroma client, then repoint the aliases"""
+        for shadow in shadows.values():
+            # The first query on a collection loads its vector index; pay that before it serves traffic
+            collection = store.client.get_collection(shadow)
+            sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+            if sample:
+                collection.query(query_embeddings=[sample[0]], n_results=1)
+        store.aliases.swap(shadows)
+        print(f"  Collections now serve version {version}")
+
+    def write_index_snapshot(self, store, collections: Dict[str, str]):
+        """Export {collection: physical collection} into a memory-mapped snapshot for the serving workers"""
+        from .index_snapshot import VECTOR_SNAPSHOT_DIR, export_chroma_collections, write_snapshot
+        from .vector_store import VECTOR_INDEX_DTYPE
+
+        exported = export_chroma_collections(store.client, list(collections.values()))
+        snapshot = {name: exported[physical_name] for name, physical_name in collections.items()}
+        snapshot_version = write_snapshot(snapshot, dtype=VECTOR_INDEX_DTYPE)
+        print(f"  Snapshot {snapshot_version} is live at {VECTOR_SNAPSHOT_DIR}")
+
+    def collect_garbage(self, store, keep: int = INGEST_KEEP_VERSIONS) -> List[str]:
+        """Drop all but the newest `keep` versions of each collection (never the live one)"""
+        existing = [collection.name for collection in store.client.list_collections()]
+        dropped = []
+        for collection_name in COLLECTION_SOURCES:
+            live = store.aliases.resolve(collection_name)
+            # The un-versioned collection from before the first swap sorts as the oldest
+            versions = sorted(
+                name for name in existing
+                if name == collection_name or name.startswith(collection_name + VERSION_SEPARATOR)
+            )
+            for name in versions[:-keep] if keep > 0 else versions:
+                if name != live:
+                    store.client.delete_collection(name)
+                    dropped.append(name)
+        if dropped:
+            print(f"  Dropped old collections: {', '.join(dropped)}")
+        return dropped
+
+
+class IngestionJob:
+    """State of one background ingestion run"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"  # queued | running | succeeded | failed
+        self.stage = "queued"
+        self.done = 0
+        self.total = 0
+        self.version: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+
+    def update(self, stage: str, done: int, total: int):
+        self.stage, self.done, self.total = stage, done, total
+
+    def as_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {
+                "chunks_embedded": self.done,
+                "chunks_total": self.total,
+                "percent": round(100 * self.done / self.total, 1) if self.total else 0.0,
+            },
+            "version": self.version,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class IngestionJobManager:
+    """
+    Runs one ingestion job at a time and keeps recent job states
+    Chunking and embedding run in a child process; a watcher thread here
+    relays its progress and writes its batches, the snapshot and the alias
+    swap through the serving client, so only one client ever opens the
+    persist directory and it also releases dropped versions' indexes
+    """
+
+    def __init__(self, history: int = 20):
+        self.history = history
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._active: Optional[IngestionJob] = None
+        self._lock = threading.Lock()
+
+    def start(self, store, documents_dir: Path = DOCUMENTS_DIR) -> IngestionJob:
+        with self._lock:
+            if self._active is not None:
+                raise IngestionInProgress(f"Ingestion job {self._active.id} is still running")
+            job = IngestionJob()
+            self._active = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.pop(next(iter(self._jobs)))
+
+        thread = threading.Thread(
+            target=self._run, args=(job, store, Path(documents_dir)),
+            name=f"ingestion-{job.id}", daemon=True
+        )
+        thread.start()
+        return job
+
+    def _run(self, job: IngestionJob, store, documents_dir: Path):
+        job.status = "running"
+        print(f"📥 Ingestion job {job.id} started")
+        try:
+            # spawn, not fork: the server has live threads and Chroma connections
+            context = multiprocessing.get_context("spawn")
+            messages = context.Queue()
+            process = context.Process(
+                target=_embed_in_process, args=(str(documents_dir), messages),
+                name=f"ingestion-{job.id}", daemon=True
+            )
+            process.start()
+
+            def batches():
+                while True:
+                    try:
+                        kind, *payload = messages.get(timeout=1)
+                    except queue.Empty:
+                        if not process.is_alive():
+                            raise RuntimeError(f"Ingestion process exited with code {process.exitcode}")
+                        continue
+                    if kind == "progress":
+                        job.update(*payload)
+                    elif kind == "batch":
+                        yield tuple(payload)
+                    elif kind == "done":
+                        return
+                    else:
+                        raise RuntimeError(payload[0])
+
+            pipeline = DataIngestionPipeline(documents_dir)
+            try:
+                version, shadows = pipeline.build(store, progress=job.update, batches=batches())
+            finally:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+            job.stage = "swapping"
+            pipeline.publish(store, version, shadows)
+            job.version = version
+            job.stage = "cleanup"
+            pipeline.collect_garbage(store)
+            job.stage = "answers"
+            refresh_precomputed_answers()
+            job.status = "succeeded"
+            job.stage = "done"
+            print(f"✅ Ingestion job {job.id} finished: version {job.version} is live")
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"❌ Ingestion job {job.id} failed: {job.error}")
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                self._active = None
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestionJob]:
+        return list(reversed(self._jobs.values()))
+
+
+def _embed_in_process(documents_dir: str, messages):
+    """Child process entry point: chunk and embed, sending the batches back (it never opens Chroma)"""
+    from langchain_openai import OpenAIEmbeddings
+
+    from .cassette import with_embedding_cassette
+
+    try:
+        # On a small machine the job shares cores with the server; let request handling win.
+        # os.nice is POSIX-only; on Windows the job runs at normal priority
+        if hasattr(os, "nice"):
+            os.nice(INGEST_NICE)
+        embeddings = with_embedding_cassette(OpenAIEmbeddings())
+        pipeline = DataIngestionPipeline(Path(documents_dir))
+        progress = lambda *update: messages.put(("progress", *update))
+        for collection_name, batch, vectors in pipeline.embed_batches(embeddings, progress):
+            messages.put(("batch", collection_name, batch, vectors))
+        messages.put(("done",))
+    except Exception as e:
+        messages.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def refresh_precomputed_answers():
+    """Rebuild the quick-question table if the documents changed and reload it (failures are not fatal)"""
+    from .answer_cache import is_stale, load_canonical_questions, materialize_answers, precomputed_answers
+
+    try:
+        questions = load_canonical_questions()
+        if is_stale(questions=questions):
+            materialize_answers(questions)
+        precomputed_answers.load()
+    except Exception as e:
+        print(f"⚠️  Could not materialize precomputed answers: {e}")
+
+
+# Global instance
+ingestion_jobs = IngestionJobManager()
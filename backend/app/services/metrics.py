@@ -0,0 +1,68 @@
+"""
+In-process metrics registry for SmartFinance AI
+Collects counters and rolling timings that are exposed at /api/metrics
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Deque
+
+
+class MetricsRegistry:
+    """Thread-safe counters and rolling timing windows"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, Deque[float]] = {}
+
+    def increment(self, name: str, value: float = 1):
+        """Add value to a counter"""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        """Record a timing sample (seconds)"""
+        with self._lock:
+            samples = self._timings.get(name)
+            if samples is None:
+                samples = self._timings[name] = deque(maxlen=self.window)
+            samples.append(value)
+
+    def count(self, name: str) -> int:
+        """Return the number of samples in a timing window"""
+        with self._lock:
+            return len(self._timings.get(name, ()))
+
+    def percentile(self, name: str, pct: float) -> float:
+        """Return the pct (0-1) percentile of a timing window, 0.0 if empty"""
+        with self._lock:
+            samples = sorted(self._timings.get(name, ()))
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(pct * len(samples)))
+        return samples[index]
+
+    def snapshot(self) -> Dict:
+        """Return a JSON-serializable view of all metrics"""
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {name: sorted(samples) for name, samples in self._timings.items()}
+
+        summary = {}
+        for name, samples in timings.items():
+            if not samples:
+                continue
+            summary[name] = {
+                "count": len(samples),
+                "p50": round(samples[len(samples) // 2], 4),
+                "p95": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 4),
+                "max": round(samples[-1], 4),
+            }
+
+        return {"counters": counters, "timings": summary}
+
+
+# Global instance
+metrics = MetricsRegistry()
@@ -0,0 +1,154 @@
+"""
+Model tiering and output-length policy for SmartFinance AI
+Picks the model and max_tokens for each LLM call from the question's
+complexity, the agent answering it and the strong model's recent latency,
+and records what was chosen (and whether answers hit the limit) in metrics
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+from .deadlines import call_timeout_kwargs
+from .metrics import metrics
+from .token_usage import current_usage
+
+MODEL_TIERING = os.getenv("MODEL_TIERING", "true").lower() == "true"
+MODEL_FAST = os.getenv("MODEL_FAST", "gpt-3.5-turbo")
+MODEL_STRONG = os.getenv("MODEL_STRONG", "gpt-4o")
+# Agents allowed to use the strong model for complex (planning) questions
+MODEL_STRONG_AGENTS = {name.strip() for name in os.getenv("MODEL_STRONG_AGENTS", "policy_agent").split(",") if name.strip()}
+# Fall back to the fast model while the strong model's rolling p95 is above this (seconds, 0 = never)
+MODEL_STRONG_MAX_P95 = float(os.getenv("MODEL_STRONG_MAX_P95", "12"))
+MODEL_LATENCY_MIN_SAMPLES = 10
+MODEL_LATENCY_CHECK_INTERVAL = 1.0  # seconds between p95 recomputations
+# While downgraded, every Nth planning question still goes to the strong model so its latency keeps being measured
+MODEL_STRONG_PROBE_EVERY = 10
+
+MAX_TOKENS_SIMPLE = int(os.getenv("MAX_TOKENS_SIMPLE", "150"))
+MAX_TOKENS_STANDARD = int(os.getenv("MAX_TOKENS_STANDARD", "400"))
+MAX_TOKENS_COMPLEX = int(os.getenv("MAX_TOKENS_COMPLEX", "800"))
+# The router replies {"agents": [...]} with up to three names: about 20 tokens, plus headroom
+# for whitespace - a truncated reply fails to parse and falls back to keyword matching
+ROUTER_MAX_TOKENS = int(os.getenv("ROUTER_MAX_TOKENS", "40"))
+
+MAX_TOKENS = {"simple": MAX_TOKENS_SIMPLE, "standard": MAX_TOKENS_STANDARD, "complex": MAX_TOKENS_COMPLEX}
+
+PLANNING_TERMS = (
+    "plan", "budget", "retire", "invest", "strategy", "should i", "how much should", "afford",
+    "debt", "wealth", "emergency fund", "goal", "compare", "advice", "help me", "tips",
+)
+LOOKUP_PATTERN = re.compile(
+    r"^(what('s| is| are| does)|how much (does|is|do)|how long|when|where|which|is (there|my)|are there|do you|does|can i)\b"
+)
+
+
+def classify_query(query: str) -> str:
+    """
+    Rough complexity of a question: "simple" (short fact lookup), "complex"
+    (planning / advice, long or multi-part) or "standard"
+    """
+    text = query.lower().strip()
+    words = len(text.split())
+    if words > 40 or text.count("?") > 1 or any(term in text for term in PLANNING_TERMS):
+        return "complex"
+    if words <= 12 and LOOKUP_PATTERN.match(text):
+        return "simple"
+    return "standard"
+
+
+class GenerationPlan:
+    """Model and output limit chosen for one LLM call"""
+
+    def __init__(self, agent: str, complexity: str, tier: str, model: str,
+                 max_tokens: Optional[int], reason: str):
+        self.agent = agent
+        self.complexity = complexity
+        self.tier = tier
+        self.model = model
+        self.max_tokens = max_tokens
+        self.reason = reason
+
+    def invoke_kwargs(self) -> Dict[str, Any]:
+        """Per-call overrides for the chat model's invoke(), including the request's remaining time"""
+        if not MODEL_TIERING:
+            return call_timeout_kwargs()
+        return {"model": self.model, "max_tokens": self.max_tokens, **call_timeout_kwargs()}
+
+    @property
+    def length_hint(self) -> str:
+        """Prompt line asking for an answer that fits max_tokens (~0.75 words per token, with headroom)"""
+        if not MODEL_TIERING or self.max_tokens is None:
+            return ""
+        return f"Answer in at most {self.max_tokens * 3 // 5} words."
+
+    def as_dict(self) -> Dict:
+        return {"agent": self.agent, "complexity": self.complexity, "tier": self.tier,
+                "model": self.model, "max_tokens": self.max_tokens, "reason": self.reason}
+
+
+class ModelPolicy:
+    """Chooses a GenerationPlan per call and records the outcome"""
+
+    def __init__(self):
+        self._strong_slow = False
+        self._strong_checked_at = float("-inf")
+        self._downgrades = 0
+
+    def plan(self, agent: str, query: str) -> GenerationPlan:
+        complexity = classify_query(query)
+        if not MODEL_TIERING:
+            return GenerationPlan(agent, complexity, "fast", MODEL_FAST, None, "tiering disabled")
+
+        tier, reason = "fast", complexity
+        if complexity == "complex" and agent in MODEL_STRONG_AGENTS:
+            tier, reason = "strong", "planning question"
+            usage = current_usage()
+            if usage is not None and usage.trim_context:
+                tier, reason = "fast", "token budget"
+            elif self.strong_model_slow():
+                self._downgrades += 1
+                if self._downgrades % MODEL_STRONG_PROBE_EVERY:
+                    tier, reason = "fast", "strong model latency"
+                    metrics.increment("llm.plan.downgraded")
+                else:
+                    reason = "latency probe"
+
+        model = MODEL_STRONG if tier == "strong" else MODEL_FAST
+        return GenerationPlan(agent, complexity, tier, model, MAX_TOKENS[complexity], reason)
+
+    def strong_model_slow(self) -> bool:
+        """
+        True while the strong model's rolling p95 latency is over MODEL_STRONG_MAX_P95
+        The percentile sorts the whole window, so it is refreshed at most once a second
+        """
+        if MODEL_STRONG_MAX_P95 <= 0:
+            return False
+        now = time.monotonic()
+        if now - self._strong_checked_at >= MODEL_LATENCY_CHECK_INTERVAL:
+            name = f"llm.model.{MODEL_STRONG}"
+            self._strong_slow = (metrics.count(name) >= MODEL_LATENCY_MIN_SAMPLES
+                                 and metrics.percentile(name, 0.95) > MODEL_STRONG_MAX_P95)
+            self._strong_checked_at = now
+        return self._strong_slow
+
+    def record(self, plan: GenerationPlan, response: Any, usage: Dict[str, int], seconds: float):
+        """
+        Count the plan, the model's latency and answers cut off by max_tokens
+        `usage` is what token_ledger.record returned for the same call
+        """
+        metrics.increment(f"llm.plan.{plan.tier}")
+        metrics.increment(f"llm.plan.{plan.agent}.{plan.complexity}")
+        metrics.observe(f"llm.model.{plan.model}", seconds)
+        # Latency with and without a prompt-cache hit, to see what the cache saves
+        cache = "cache_hit" if usage.get("cached_prompt_tokens") else "cache_miss"
+        metrics.observe(f"llm.latency.{plan.agent}.{cache}", seconds)
+        metrics.increment(f"llm.completion_tokens.{plan.tier}", usage["completion_tokens"])
+        metadata = getattr(response, "response_metadata", None) or {}
+        if metadata.get("finish_reason") == "length" or metadata.get("stop_reason") == "max_tokens":
+            metrics.increment(f"llm.plan.truncated.{plan.complexity}")
+
+
+# Global instance
+model_policy = ModelPolicy()
@@ -0,0 +1,301 @@
+"""
+NumPy exact-search vector index
+Each collection is one contiguous matrix of L2-normalized rows (float32,
+float16 or int8 with a per-row scale), searched by a blocked matrix-vector
+product and argpartition. Results are exact, the index builds in well under
+a second and metadata-filtered queries use cached masks instead of Chroma's
+post-filtering (see benchmarks/bench_vector_search.py)
+"""
+
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .collection_aliases import CollectionAliases
+from .vector_store import OPENAI_AVAILABLE, VectorStoreService
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+# Seconds between checks for a newer index snapshot
+VECTOR_SNAPSHOT_POLL = float(os.getenv("VECTOR_SNAPSHOT_POLL", "5"))
+
+# Rows converted to float32 per scoring step for float16/int8 storage; small
+# blocks keep the converted rows in cache (256 was fastest for 1536-d rows)
+SCORE_BLOCK_ROWS = 256
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _matches(metadata: Dict, filter_dict: Dict) -> bool:
+    """Chroma-style filter: {"field": value}, {"field": {"$in": [...]}} and {"$and": [...]}"""
+    for field, condition in filter_dict.items():
+        if field == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if "$in" in condition and metadata.get(field) not in condition["$in"]:
+                return False
+            if "$eq" in condition and metadata.get(field) != condition["$eq"]:
+                return False
+            if "$ne" in condition and metadata.get(field) == condition["$ne"]:
+                return False
+        elif metadata.get(field) != condition:
+            return False
+    return True
+
+
+def _filter_key(filter_dict: Dict) -> str:
+    return repr(sorted(filter_dict.items(), key=lambda item: item[0]))
+
+
+class NumpyIndex:
+    """Exact cosine-similarity index for one collection"""
+
+    def __init__(self, dimension: int, dtype: str = "float32"):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported index dtype {dtype!r} (expected one of {SUPPORTED_DTYPES})")
+        self.dimension = dimension
+        self.dtype = dtype
+        self.matrix = np.empty((0, dimension), dtype=np.int8 if dtype == "int8" else dtype)
+        self.scales = np.empty(0, dtype=np.float32)  # int8 only: row = matrix * scale
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._masks: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_arrays(cls, matrix: np.ndarray, scales: np.ndarray, texts: Sequence[str],
+                    metadatas: List[Dict], dtype: str) -> "NumpyIndex":
+        """Wrap already-encoded rows (e.g. memory-mapped snapshot files) without copying"""
+        index = cls(matrix.shape[1], dtype)
+        index.matrix, index.scales, index.texts, index.metadatas = matrix, scales, texts, metadatas
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vectors (excluding texts and metadata)"""
+        return self.matrix.nbytes + self.scales.nbytes
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = _normalize(np.asarray(vectors, dtype=np.float32))
+        if self.dtype == "int8":
+            scales = np.abs(rows).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(rows / scales[:, None]).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return rows.astype(self.dtype), np.empty(0, dtype=np.float32)
+
+    def add(self, vectors: Sequence[Sequence[float]], texts: List[str], metadatas: Optional[List[Dict]] = None):
+        """Append rows (the matrix is rebuilt so it stays contiguous)"""
+        if len(vectors) == 0:
+            return
+        rows, scales = self._encode(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self.matrix = np.ascontiguousarray(np.concatenate([self.matrix, rows]))
+            if self.dtype == "int8":
+                self.scales = np.concatenate([self.scales, scales])
+            if not isinstance(self.texts, list):
+                # Snapshot-backed texts are read-only - copy before appending
+                self.texts = list(self.texts)
+            self.texts.extend(texts)
+            self.metadatas.extend((metadatas[i] or {}) if metadatas else {} for i in range(len(texts)))
+            self._masks.clear()
+
+    def vector(self, row: int) -> np.ndarray:
+        """Stored (normalized) row as float32"""
+        vector = self.matrix[row].astype(np.float32)
+        return vector * self.scales[row] if self.dtype == "int8" else vector
+
+    def mask(self, filter_dict: Dict) -> np.ndarray:
+        """Boolean row mask for a metadata filter, computed once per filter"""
+        key = _filter_key(filter_dict)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.fromiter((_matches(m, filter_dict) for m in self.metadatas), dtype=bool, count=len(self.metadatas))
+            self._masks[key] = mask
+        return mask
+
+    def scores(self, query_vector: Sequence[float]) -> np.ndarray:
+        """Cosine similarity of the query to every row"""
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        if self.dtype == "float32":
+            return np.dot(self.matrix, query)
+
+        # float16/int8 have no BLAS path - convert into a reused float32 block
+        out = np.empty(len(self.matrix), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(self.matrix)), self.dimension), dtype=np.float32)
+        for start in range(0, len(self.matrix), SCORE_BLOCK_ROWS):
+            block = self.matrix[start:start + SCORE_BLOCK_ROWS]
+            rows = len(block)
+            np.copyto(buffer[:rows], block, casting="unsafe")
+            np.dot(buffer[:rows], query, out=out[start:start + rows])
+        if self.dtype == "int8":
+            out *= self.scales
+        return out
+
+    def search(self, query_vector: Sequence[float], k: int = 3, filter_dict: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """Exact top-k as (row, score), best first"""
+        with self._lock:
+            if not len(self.texts) or k <= 0:
+                return []
+            scores = self.scores(query_vector)
+            if filter_dict:
+                mask = self.mask(filter_dict)
+                if not mask.any():
+                    return []
+                scores = np.where(mask, scores, -np.inf)
+                k = min(k, int(mask.sum()))
+            k = min(k, len(scores))
+
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(row), float(scores[row])) for row in top]
+
+
+class NumpyVectorStoreService(VectorStoreService):
+    """
+    VectorStoreService that answers queries from NumPy indexes
+    Collections come from the live memory-mapped snapshot when ingest_data.py
+    has written one (see index_snapshot.py), otherwise their embeddings are
+    exported from Chroma on first use. Chroma stays the system of record and
+    new documents go to both.
+    """
+
+    def __init__(self, persist_directory: str = "./chroma_db", dtype: str = "float32"):
+        # Chroma is only opened if a collection is missing from the snapshot
+        # or documents are added, so snapshot-backed workers start instantly
+        if not OPENAI_AVAILABLE or not os.getenv("OPENAI_API_KEY"):
+            raise ValueError("OpenAI API key not available - vector store requires OpenAI")
+        from langchain_openai import OpenAIEmbeddings
+        from .cassette import with_embedding_cassette
+
+        self.persist_directory = persist_directory
+        self.aliases = CollectionAliases(Path(persist_directory) / "collection_aliases.json")
+        self.embeddings = with_embedding_cassette(OpenAIEmbeddings())
+        self.dtype = dtype
+        self._client = None
+        self._indexes: Dict[str, NumpyIndex] = {}
+        self._indexes_lock = threading.Lock()
+        self.snapshot_version: Optional[str] = None
+        self._snapshot_checked_at = 0.0
+        self._check_snapshot()
+
+    @property
+    def client(self):
+        if self._client is None:
+            import chromadb
+            self._client = chromadb.PersistentClient(path=self.persist_directory)
+        return self._client
+
+    def _check_snapshot(self):
+        """Swap in a newer snapshot if CURRENT has moved (checked every VECTOR_SNAPSHOT_POLL seconds)"""
+        now = time.monotonic()
+        if now - self._snapshot_checked_at < VECTOR_SNAPSHOT_POLL:
+            return
+        self._snapshot_checked_at = now
+
+        from .index_snapshot import current_version, open_snapshot
+
+        version = current_version()
+        if version is None or version == self.snapshot_version:
+            return
+        try:
+            indexes = open_snapshot(version)
+        except Exception as e:
+            print(f"⚠️  Could not open vector snapshot {version}: {e}")
+            return
+
+        # Queries already running keep the old mapping until they finish
+        with self._indexes_lock:
+            self._indexes = indexes
+            self.snapshot_version = version
+        rows = sum(len(index) for index in indexes.values())
+        print(f"✓ Mapped vector snapshot {version}: {len(indexes)} collections, {rows} rows")
+
+    def get_index(self, collection_name: str) -> NumpyIndex:
+        """Index for a collection from the live snapshot, or exported from Chroma on first use"""
+        self._check_snapshot()
+        index = self._indexes.get(collection_name)
+        if index is not None:
+            return index
+
+        # Exports are cached under the physical name, so an alias swap is picked up
+        physical_name = self.aliases.resolve(collection_name)
+        index = self._indexes.get(physical_name)
+        if index is not None:
+            return index
+
+        with self._indexes_lock:
+            if physical_name not in self._indexes:
+                try:
+                    # get_collection, not get_or_create: reads never write to Chroma's sysdb
+                    data = self.client.get_collection(physical_name).get(include=["embeddings", "documents", "metadatas"])
+                except ValueError:
+                    data = {}
+                embeddings = data.get("embeddings")
+                if embeddings is None or len(embeddings) == 0:
+                    dimension = len(self.embeddings.embed_query("dimension probe"))
+                    index = NumpyIndex(dimension, self.dtype)
+                else:
+                    index = NumpyIndex(len(embeddings[0]), self.dtype)
+                    index.add(embeddings, data["documents"], data["metadatas"])
+                print(f"✓ NumPy index for {physical_name}: {len(index)} rows, {index.nbytes / 1e6:.1f} MB ({self.dtype})")
+                self._indexes[physical_name] = index
+            return self._indexes[physical_name]
+
+    def query_documents(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 3,
+        filter_dict: Optional[Dict] = None
+    ) -> List[str]:
+        """Query documents from a specific collection"""
+        index = self.get_index(collection_name)
+        hits = index.search(self.embeddings.embed_query(query), k=k, filter_dict=filter_dict)
+        return [index.texts[row] for row, _ in hits]
+
+    def _query_collection(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        k: int,
+        filter_dict: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Top-k candidates for an embedded query, with their stored embeddings"""
+        index = self.get_index(collection_name)
+        return [
+            {"text": index.texts[row], "metadata": index.metadatas[row], "score": score,
+             "vector": index.vector(row), "collection": collection_name}
+            for row, score in index.search(query_vector, k=k, filter_dict=filter_dict)
+        ]
+
+    def add_documents(
+        self,
+        collection_name: str,
+        texts: List[str],
+        metadatas: Optional[List[Dict]] = None
+    ):
+        """Add documents to a collection"""
+        index = self.get_index(collection_name)
+        vectors = self.embeddings.embed_documents(texts)
+        collection = self.client.get_or_create_collection(self.aliases.resolve(collection_name))
+        collection.add(
+            ids=[str(uuid.uuid4()) for _ in texts],
+            embeddings=vectors,
+            documents=texts,
+            metadatas=metadatas
+        )
+        index.add(vectors, texts, metadatas)
@@ -0,0 +1,248 @@
+"""
+Token and cost accounting for SmartFinance AI
+Counts prompt/completion tokens per LLM call, per agent, per session and per
+day, and enforces optional per-session and per-day token budgets
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from .metrics import metrics
+
+TOKEN_BUDGET_SESSION = int(os.getenv("TOKEN_BUDGET_SESSION", "0"))  # 0 = unlimited
+TOKEN_BUDGET_DAILY = int(os.getenv("TOKEN_BUDGET_DAILY", "0"))  # 0 = unlimited
+TOKEN_BUDGET_MODE = os.getenv("TOKEN_BUDGET_MODE", "trim").lower()  # trim | reject
+MAX_TRACKED_SESSIONS = 10000
+
+# Session id for requests that sent none. Every such client shares it, so no
+# per-session state (budget, profile) is kept under it
+ANONYMOUS_SESSION = "default"
+
+
+def is_anonymous_session(session_id: Optional[str]) -> bool:
+    return not session_id or session_id == ANONYMOUS_SESSION
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a request would exceed a token budget in reject mode"""
+
+
+_encoding = None
+_encoding_failed = False
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken (cl100k_base), or estimate ~4 chars/token if unavailable"""
+    global _encoding, _encoding_failed
+    if not text:
+        return 0
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding_failed = True
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, list):
+        return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+    return str(prompt)
+
+
+def cached_prompt_tokens(response: Any) -> int:
+    """
+    Prompt tokens the provider served from its prompt cache: OpenAI
+    prompt_tokens_details.cached_tokens, Anthropic/Bedrock cache_read_input_tokens
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    cached = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached:
+        return cached
+
+    metadata = getattr(response, "response_metadata", None) or {}
+    reported = metadata.get("token_usage") or metadata.get("usage") or {}
+    details = reported.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or reported.get("cache_read_input_tokens") or 0
+
+
+def usage_from_response(prompt: Any, response: Any) -> Dict[str, int]:
+    """
+    Prompt/completion tokens for one call - provider-reported usage when the
+    response carries it, otherwise counted locally
+    cached_prompt_tokens is the part of prompt_tokens read from the provider's cache
+    """
+    cached = cached_prompt_tokens(response)
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return {"prompt_tokens": usage.get("input_tokens", 0), "completion_tokens": usage.get("output_tokens", 0),
+                "cached_prompt_tokens": cached}
+
+    metadata = getattr(response, "response_metadata", None) or {}
+    reported = metadata.get("token_usage") or metadata.get("usage")
+    if reported:
+        return {
+            "prompt_tokens": reported.get("prompt_tokens", reported.get("input_tokens", 0)),
+            "completion_tokens": reported.get("completion_tokens", reported.get("output_tokens", 0)),
+            "cached_prompt_tokens": cached,
+        }
+
+    return {
+        "prompt_tokens": count_tokens(_prompt_text(prompt)),
+        "completion_tokens": count_tokens(getattr(response, "content", "") or ""),
+        "cached_prompt_tokens": 0,
+    }
+
+
+class RequestUsage:
+    """Token usage collected while one request runs through the graph"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.trim_context = False
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: Dict):
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            calls = list(self.calls)
+        prompt = sum(call["prompt_tokens"] for call in calls)
+        completion = sum(call["completion_tokens"] for call in calls)
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "cached_prompt_tokens": sum(call.get("cached_prompt_tokens", 0) for call in calls),
+            "context_trimmed": self.trim_context,
+            "calls": calls,
+        }
+
+
+# Graph nodes run in threads that copy the caller's context, so every LLM call
+# made on behalf of a request sees that request's collector
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("current_usage", default=None)
+
+
+def current_usage() -> Optional[RequestUsage]:
+    return _current_usage.get()
+
+
+@contextmanager
+def usage_scope(session_id: str):
+    """Reuse the active request collector, or start a new one for this request"""
+    existing = _current_usage.get()
+    if existing is not None:
+        yield existing
+        return
+
+    usage = RequestUsage(session_id)
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+class TokenLedger:
+    """Running token totals per agent, per session and per day, with budgets"""
+
+    def __init__(self, session_budget: int = TOKEN_BUDGET_SESSION,
+                 daily_budget: int = TOKEN_BUDGET_DAILY,
+                 mode: str = TOKEN_BUDGET_MODE):
+        self.session_budget = session_budget
+        self.daily_budget = daily_budget
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._agents: Dict[str, Dict[str, int]] = {}
+        self._day = date.today()
+        self._day_total = 0
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self._day:
+            self._day, self._day_total = today, 0
+
+    def record(self, agent: str, prompt: Any, response: Any) -> Dict:
+        """Record one LLM call made by agent for the active request"""
+        usage = usage_from_response(prompt, response)
+        total = usage["prompt_tokens"] + usage["completion_tokens"]
+        request = current_usage()
+        session_id = request.session_id if request else "unknown"
+
+        with self._lock:
+            self._roll_day()
+            self._day_total += total
+            if not is_anonymous_session(session_id):
+                self._sessions[session_id] = self._sessions.pop(session_id, 0) + total
+                if len(self._sessions) > MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+            agent_totals = self._agents.setdefault(agent, {"prompt_tokens": 0, "completion_tokens": 0,
+                                                           "cached_prompt_tokens": 0, "calls": 0})
+            agent_totals["prompt_tokens"] += usage["prompt_tokens"]
+            agent_totals["completion_tokens"] += usage["completion_tokens"]
+            agent_totals["cached_prompt_tokens"] += usage["cached_prompt_tokens"]
+            agent_totals["calls"] += 1
+
+        metrics.increment(f"tokens.prompt.{agent}", usage["prompt_tokens"])
+        metrics.increment(f"tokens.completion.{agent}", usage["completion_tokens"])
+        metrics.increment(f"tokens.cached.{agent}", usage["cached_prompt_tokens"])
+        if request is not None:
+            request.add({"agent": agent, **usage})
+        return usage
+
+    def check_budget(self, session_id: str) -> str:
+        """
+        Return "ok" if the request may run normally, "trim" if optional context
+        should be dropped, or raise TokenBudgetExceeded in reject mode
+        Requests without a session only count against the daily budget
+        """
+        with self._lock:
+            self._roll_day()
+            over_session = (self.session_budget and not is_anonymous_session(session_id)
+                            and self._sessions.get(session_id, 0) >= self.session_budget)
+            over_daily = self.daily_budget and self._day_total >= self.daily_budget
+
+        if not (over_session or over_daily):
+            return "ok"
+
+        scope = "session" if over_session else "daily"
+        metrics.increment(f"tokens.budget_exceeded.{scope}")
+        if self.mode == "reject":
+            raise TokenBudgetExceeded(f"The {scope} token budget has been used up. Please try again later.")
+        return "trim"
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._roll_day()
+            return {
+                "day": self._day.isoformat(),
+                "day_total": self._day_total,
+                "daily_budget": self.daily_budget or None,
+                "session_budget": self.session_budget or None,
+                "budget_mode": self.mode,
+                "tracked_sessions": len(self._sessions),
+                "agents": {name: dict(totals) for name, totals in self._agents.items()},
+            }
+
+    def session_total(self, session_id: str) -> int:
+        with self._lock:
+            return self._sessions.get(session_id, 0)
+
+
+# Global instance
+token_ledger = TokenLedger()
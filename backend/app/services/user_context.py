@@ -0,0 +1,120 @@
+"""
+Server-side cache of structured user context
+Clients send only the fields that changed; the merged profile is kept per
+session and rendered into a compact, deterministic block so
+the prompt prefix stays byte-identical between turns
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+USER_CONTEXT_TTL = float(os.getenv("USER_CONTEXT_TTL", "3600"))  # seconds since last update
+USER_CONTEXT_CACHE_SIZE = int(os.getenv("USER_CONTEXT_CACHE_SIZE", "10000"))
+
+
+def rewards_tier(points: int) -> str:
+    """Rewards tier for a points balance (same thresholds as the frontend)"""
+    if points >= 50000:
+        return "Platinum"
+    if points >= 25000:
+        return "Gold"
+    return "Silver"
+
+
+def _money(value: float) -> str:
+    return f"${value:,.2f}"
+
+
+def render_user_context(context: Dict) -> str:
+    """
+    Render a structured profile as a compact block
+    Field order and number formatting are fixed so the same profile always
+    produces the same text
+    """
+    if not context:
+        return ""
+
+    lines = ["USER PROFILE:"]
+
+    balance = context.get("total_balance")
+    if balance is not None:
+        line = f"balance={_money(balance)}"
+        if context.get("balance_change_pct") is not None:
+            line += f" ({context['balance_change_pct']:+g}% this month)"
+        lines.append(line)
+
+    saved = context.get("saved_this_month")
+    goal = context.get("savings_goal")
+    if saved is not None and goal:
+        lines.append(f"monthly_savings={_money(saved)}/{_money(goal)} ({round(saved / goal * 100)}%)")
+    elif saved is not None:
+        lines.append(f"monthly_savings={_money(saved)}")
+
+    points = context.get("rewards_points")
+    if points is not None:
+        lines.append(f"rewards={points:,} pts ({context.get('rewards_tier') or rewards_tier(points)})")
+
+    if context.get("active_goals") is not None:
+        lines.append(f"active_goals={context['active_goals']}")
+    if context.get("premium") is not None:
+        lines.append(f"premium={'yes' if context['premium'] else 'no'}")
+
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+
+class UserContextCache:
+    """LRU cache of merged user profiles with an idle TTL"""
+
+    def __init__(self, ttl: float = USER_CONTEXT_TTL, max_entries: int = USER_CONTEXT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Dict:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return {}
+            updated_at, context = entry
+            if time.monotonic() - updated_at > self.ttl:
+                del self._entries[key]
+                return {}
+            return dict(context)
+
+    def update(self, key: str, changes: Dict) -> Dict:
+        """Merge changed fields into the cached profile (None clears a field)"""
+        merged = self.get(key)
+        merged.update(changes)
+        merged = {name: value for name, value in merged.items() if value is not None}
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), merged)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return merged
+
+    def resolve(self, key: Optional[str], changes: Optional[Dict] = None, legacy_text: Optional[str] = None) -> Optional[str]:
+        """
+        Prompt text for a request: a free-text user_context from older clients
+        is used as-is, otherwise the cached profile with any changes applied
+        Without a key (no session) only the request's own changes are used and
+        nothing is read from or written to the cache
+        """
+        if legacy_text:
+            return legacy_text
+        if key is None:
+            return render_user_context({k: v for k, v in (changes or {}).items() if v is not None}) or None
+        context = self.update(key, changes) if changes else self.get(key)
+        return render_user_context(context) or None
+
+    def clear(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+# Global instance
+user_context_cache = UserContextCache()
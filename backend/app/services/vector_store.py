@@ -1,15 +1,26 @@
-import chromadb
-from chromadb.config import Settings
-from langchain_community.vectorstores import Chroma
-from typing import List, Dict, Optional
+from importlib.util import find_spec
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+import threading
 import os
 
-# Only import OpenAI if available
-try:
-    from langchain_openai import OpenAIEmbeddings
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+from .collection_aliases import CollectionAliases
+
+# chromadb, langchain_community and langchain_openai are imported on first use
+# so that importing this module stays cheap on the startup path
+OPENAI_AVAILABLE = find_spec("langchain_openai") is not None
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+
+
+def type_filter(doc_types: Optional[List[str]]) -> Optional[Dict]:
+    """Metadata filter selecting chunks by their `type` (billing, technical, financial_planning, policy)"""
+    if not doc_types:
+        return None
+    if len(doc_types) == 1:
+        return {"type": doc_types[0]}
+    return {"type": {"$in": list(doc_types)}}
 
 
 class VectorStoreService:
@@ -19,14 +30,21 @@ class VectorStoreService:
         self.persist_directory = persist_directory
         if not OPENAI_AVAILABLE or not os.getenv("OPENAI_API_KEY"):
             raise ValueError("OpenAI API key not available - vector store requires OpenAI")
-        self.embeddings = OpenAIEmbeddings()
+        import chromadb
+        from langchain_openai import OpenAIEmbeddings
+        from .cassette import with_embedding_cassette
+        
+        self.embeddings = with_embedding_cassette(OpenAIEmbeddings())
         self.client = chromadb.PersistentClient(path=persist_directory)
+        self.aliases = CollectionAliases(Path(persist_directory) / "collection_aliases.json")
+        
+    def get_collection(self, collection_name: str) -> "Chroma":
+        """Get or create the ChromaDB collection an alias currently points at"""
+        from langchain_community.vectorstores import Chroma
         
-    def get_collection(self, collection_name: str) -> Chroma:
-        """Get or create a ChromaDB collection"""
         return Chroma(
             client=self.client,
-            collection_name=collection_name,
+            collection_name=self.aliases.resolve(collection_name),
             embedding_function=self.embeddings
         )
     
@@ -47,6 +65,80 @@ class VectorStoreService:
             
         return [doc.page_content for doc in results]
     
+    def _query_collection(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        k: int,
+        filter_dict: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Top-k {"text", "metadata", "score", "vector", "collection"} candidates for an embedded query"""
+        import numpy as np
+        
+        try:
+            # get_collection, not get_or_create: reads never write to Chroma's sysdb
+            collection = self.client.get_collection(self.aliases.resolve(collection_name))
+        except ValueError:
+            return []
+        results = collection.query(
+            query_embeddings=[query_vector],
+            n_results=k,
+            where=filter_dict or None,
+            include=["documents", "metadatas", "embeddings", "distances"]
+        )
+        if not results["ids"][0]:
+            return []
+        return [
+            {
+                "text": text,
+                "metadata": metadata or {},
+                # Squared L2 between unit vectors -> cosine similarity
+                "score": 1.0 - distance / 2,
+                "vector": np.asarray(vector, dtype=np.float32),
+                "collection": collection_name,
+            }
+            for text, metadata, vector, distance in zip(
+                results["documents"][0], results["metadatas"][0],
+                results["embeddings"][0], results["distances"][0]
+            )
+        ]
+    
+    def query_candidates(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 8,
+        filter_dict: Optional[Dict] = None
+    ) -> Tuple[List[float], List[Dict]]:
+        """
+        Query embedding plus the top-k candidates with their stored embeddings,
+        as {"text", "metadata", "score", "vector", "collection"} dicts, for reranking
+        """
+        query_vector = self.embeddings.embed_query(query)
+        return query_vector, self._query_collection(collection_name, query_vector, k, filter_dict)
+    
+    def search(
+        self,
+        query: str,
+        collection_names: List[str],
+        k: int = 8,
+        doc_types: Optional[List[str]] = None
+    ) -> Tuple[List[float], List[Dict]]:
+        """
+        Embed the query once and search several collections, optionally only
+        chunks whose `type` metadata is in doc_types. Returns the query
+        embedding and the best k candidates across all collections by score.
+        """
+        query_vector = self.embeddings.embed_query(query)
+        filter_dict = type_filter(doc_types)
+        candidates = [
+            candidate
+            for collection_name in collection_names
+            for candidate in self._query_collection(collection_name, query_vector, k, filter_dict)
+        ]
+        candidates.sort(key=lambda candidate: candidate["score"], reverse=True)
+        return query_vector, candidates[:k]
+    
     def add_documents(
         self,
         collection_name: str,
@@ -58,14 +150,45 @@ class VectorStoreService:
         collection.add_texts(texts=texts, metadatas=metadatas)
 
 
-# Global instance - only create if OpenAI is available
-vector_store = None
-if OPENAI_AVAILABLE and os.getenv("OPENAI_API_KEY"):
-    try:
-        vector_store = VectorStoreService(
-            persist_directory=os.getenv("CHROMA_DB_PATH", "./chroma_db")
-        )
-    except Exception as e:
-        print(f"⚠️  Vector store initialization failed: {e}")
-        print("⚠️  Running without vector store (mock AI mode)")
+# Search engine: chroma (HNSW via Chroma) | numpy (exact in-memory search, see numpy_index.py)
+VECTOR_STORE_ENGINE = os.getenv("VECTOR_STORE_ENGINE", "chroma").lower()
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32").lower()  # float32 | float16 | int8
+
+
+def _create_vector_store(persist_directory: str) -> VectorStoreService:
+    if VECTOR_STORE_ENGINE == "numpy":
+        from .numpy_index import NumpyVectorStoreService
+        return NumpyVectorStoreService(persist_directory=persist_directory, dtype=VECTOR_INDEX_DTYPE)
+    return VectorStoreService(persist_directory=persist_directory)
+
+
+# Global instance - created on first use, and only if OpenAI is available
+_vector_store: Optional[VectorStoreService] = None
+_vector_store_initialized = False
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store() -> Optional[VectorStoreService]:
+    """Return the shared vector store, opening it on first call (None without OpenAI)"""
+    global _vector_store, _vector_store_initialized
+    if _vector_store_initialized:
+        return _vector_store
+    
+    with _vector_store_lock:
+        if not _vector_store_initialized:
+            if OPENAI_AVAILABLE and os.getenv("OPENAI_API_KEY"):
+                try:
+                    _vector_store = _create_vector_store(os.getenv("CHROMA_DB_PATH", "./chroma_db"))
+                except Exception as e:
+                    print(f"⚠️  Vector store initialization failed: {e}")
+                    print("⚠️  Running without vector store (mock AI mode)")
+            _vector_store_initialized = True
+    return _vector_store
+
+
+def __getattr__(name: str):
+    # Backwards compatible `from app.services.vector_store import vector_store`
+    if name == "vector_store":
+        return get_vector_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
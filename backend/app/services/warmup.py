@@ -0,0 +1,99 @@
+"""
+Startup warm-up and readiness tracking
+Builds the orchestrator off the request path, pre-opens the vector store and
+runs warm queries so the first real request does not pay for them
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from .answer_cache import precomputed_answers
+from .vector_store import get_vector_store
+
+WARMUP_QUERIES = os.getenv("WARMUP_QUERIES", "true").lower() == "true"
+# A failed warm-up is retried after this many seconds, doubling up to WARMUP_RETRY_MAX_DELAY
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", "5"))
+WARMUP_RETRY_MAX_DELAY = float(os.getenv("WARMUP_RETRY_MAX_DELAY", "300"))
+WARMUP_COLLECTIONS = ["billing_documents", "technical_documents", "policy_documents"]
+
+
+class WarmupState:
+    """Readiness of the AI stack, reported by /health/ready"""
+
+    def __init__(self):
+        self.status = "pending"  # pending | warming | ready | failed (retrying)
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.started_at: Optional[datetime] = None
+        self.duration: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def as_dict(self) -> Dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "attempts": self.attempts,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "warmup_seconds": round(self.duration, 3) if self.duration is not None else None,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def _warm_up():
+    """Blocking warm-up work, run in a worker thread"""
+    from ..agents.orchestrator import get_orchestrator
+
+    orchestrator = get_orchestrator()
+    precomputed_answers.load()
+    if orchestrator.use_mock or not WARMUP_QUERIES:
+        return
+
+    store = get_vector_store()
+    if store is None:
+        return
+
+    # One embedding and a search of every collection open the OpenAI connection
+    # pool and load each collection into memory. search() only reads (it never
+    # creates a missing collection, unlike the langchain query_documents path)
+    try:
+        store.search("warm-up", list(WARMUP_COLLECTIONS), k=1)
+    except Exception as e:
+        print(f"⚠️  Warm-up search failed: {e}")
+
+
+async def run_warmup():
+    """
+    Warm the service in the background and record readiness
+    Failures are retried with backoff, so a transient error (or one a later
+    lazy get_orchestrator() in /api/chat got past) does not leave the
+    instance reporting not-ready for good
+    """
+    warmup_state.status = "warming"
+    warmup_state.started_at = datetime.now()
+    start = time.perf_counter()
+    delay = WARMUP_RETRY_DELAY
+
+    while True:
+        warmup_state.attempts += 1
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, _warm_up)
+            warmup_state.status = "ready"
+            warmup_state.error = None
+            warmup_state.duration = time.perf_counter() - start
+            print(f"✓ Warm-up complete in {warmup_state.duration:.2f}s - service is ready")
+            return
+        except Exception as e:
+            warmup_state.status = "failed"
+            warmup_state.error = f"{type(e).__name__}: {e}"
+            warmup_state.duration = time.perf_counter() - start
+            print(f"⚠️  Warm-up failed (attempt {warmup_state.attempts}): {warmup_state.error} - retrying in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, WARMUP_RETRY_MAX_DELAY)
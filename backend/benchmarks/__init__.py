@@ -0,0 +1 @@
+# SmartFinance AI offline benchmarks
@@ -0,0 +1,149 @@
+"""
+Chunking benchmark: fixed 1000-char / 200-overlap splitter vs the
+structure-aware chunker with MinHash de-duplication
+Reports index size (vectors, stored tokens, overlap), average tokens sent to
+the LLM for k retrieved chunks, and how often the retrieved chunks contain a
+known answer sentence intact. Retrieval uses TF-IDF cosine similarity as a
+stand-in for embeddings so no API key is needed. --pack also reports the
+context actually sent after MMR packing (app/services/context_packing.py).
+
+Usage (from backend/):
+    python -m benchmarks.bench_chunking [--k 4] [--pack]
+"""
+
+import argparse
+import math
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.services.chunking import MinHashDeduplicator, StructuredChunker
+from app.services.context_packing import CONTEXT_CANDIDATES, ContextPacker
+from app.services.token_usage import count_tokens
+
+DOCUMENTS_DIR = Path(__file__).resolve().parent.parent / "data" / "mock_documents"
+
+# Same grouping as COLLECTION_SOURCES in app/services/ingestion.py
+COLLECTIONS = {
+    "billing_documents": ["billing_policies.txt"],
+    "technical_documents": ["technical_faqs.txt", "savings_and_goals.txt"],
+    "policy_documents": ["fraud_prevention.txt"],
+}
+
+# (question, sentence the answer must contain)
+QUESTIONS = [
+    ("How do I reset my password?", "The link expires in 30 minutes"),
+    ("What is the overdraft fee?", "Overdraft Fee: $35 per occurrence"),
+    ("What documents do I need to open an account?", "Proof of address"),
+    ("What should I do if I am a victim of identity theft?", "Lock all cards and accounts immediately"),
+    ("How does the 50/30/20 budgeting rule work?", "50% - Needs (Essential Expenses)"),
+    ("The app keeps crashing on startup", "Force close the app completely"),
+    ("How do I set up auto-save?", "Go to Profile > Auto-Save Settings"),
+    ("What is the high-yield savings APY?", "High-Yield Savings Account APY: 4.25%"),
+    ("How much is an international ATM withdrawal?", "International ATM Withdrawal: $5.00"),
+    ("How do I create a savings goal?", "Tap the \"Create New Goal\" button"),
+]
+
+
+def legacy_chunks(text: str):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=200, length_function=len, separators=["\n\n", "\n", " ", ""]
+    )
+    return splitter.split_text(text)
+
+
+def structured_chunks(files):
+    chunker = StructuredChunker()
+    chunks = [chunk for text in files for chunk in chunker.split(text)]
+    return [chunk["text"] for chunk in MinHashDeduplicator().filter(chunks)]
+
+
+def words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+class TfidfIndex:
+    def __init__(self, texts):
+        self.texts = texts
+        counts = [Counter(words(text)) for text in texts]
+        df = Counter(term for count in counts for term in count)
+        self.vocab = {term: i for i, term in enumerate(df)}
+        self.idf = np.array([math.log(len(texts) / df[term]) + 1 for term in df])
+        self.matrix = np.array([self._vector(count) for count in counts])
+
+    def _vector(self, count):
+        vector = np.zeros(len(self.vocab))
+        for term, n in count.items():
+            if term in self.vocab:
+                vector[self.vocab[term]] = n
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, query, k):
+        scores = self.matrix @ self._vector(Counter(words(query)))
+        return [self.texts[i] for i in np.argsort(-scores)[:k]]
+
+    def packed(self, query, packer, k=CONTEXT_CANDIDATES):
+        query_vector = self._vector(Counter(words(query)))
+        rows = np.argsort(-(self.matrix @ query_vector))[:k]
+        return packer.pack(query_vector, [{"text": self.texts[i], "vector": self.matrix[i]} for i in rows])
+
+
+def measure(name, make_chunks, k, packer=None):
+    collections = {}
+    for collection, files in COLLECTIONS.items():
+        texts = [(DOCUMENTS_DIR / f).read_text(encoding="utf-8") for f in files]
+        collections[collection] = make_chunks(texts)
+    chunks = [chunk for texts in collections.values() for chunk in texts]
+    source_tokens = sum(count_tokens((DOCUMENTS_DIR / f).read_text(encoding="utf-8"))
+                        for files in COLLECTIONS.values() for f in files)
+    stored_tokens = sum(count_tokens(chunk) for chunk in chunks)
+
+    index = TfidfIndex(chunks)
+    retrieved_tokens, hits = [], 0
+    for question, answer in QUESTIONS:
+        results = index.packed(question, packer) if packer else index.search(question, k)
+        retrieved_tokens.append(sum(count_tokens(chunk) for chunk in results))
+        hits += any(answer in chunk for chunk in results)
+
+    return {
+        "name": name,
+        "vectors": len(chunks),
+        "stored_tokens": stored_tokens,
+        # Tokens stored beyond the source text; heading prefixes and dedup can make that negative
+        "redundant_pct": 100 * max(0, stored_tokens - source_tokens) / source_tokens,
+        "avg_chunk_tokens": stored_tokens / len(chunks),
+        "avg_retrieved_tokens": sum(retrieved_tokens) / len(retrieved_tokens),
+        "answer_hit_rate": hits / len(QUESTIONS),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=4, help="chunks retrieved per question without packing")
+    parser.add_argument("--pack", action="store_true", help="also measure MMR context packing")
+    args = parser.parse_args()
+
+    results = [
+        measure("fixed-1000/200", lambda texts: [c for text in texts for c in legacy_chunks(text)], args.k),
+        measure("structured", structured_chunks, args.k),
+    ]
+    if args.pack:
+        results.append(measure("structured+pack", structured_chunks, args.k, ContextPacker()))
+
+    print(f"{'chunker':<15} {'vectors':>8} {'stored tok':>11} {'redundant':>10} {'tok/chunk':>10} "
+          f"{'tok/query':>10} {'answer hit':>11}")
+    for r in results:
+        print(f"{r['name']:<15} {r['vectors']:>8} {r['stored_tokens']:>11} {r['redundant_pct']:>9.1f}% "
+              f"{r['avg_chunk_tokens']:>10.0f} {r['avg_retrieved_tokens']:>10.0f} {r['answer_hit_rate']:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
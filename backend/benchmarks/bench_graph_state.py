@@ -0,0 +1,148 @@
+"""
+LangGraph state-update benchmark
+Runs the orchestrator's real graph with a stub router model and stub agents,
+so everything measured is graph and state-handling overhead. Compares the
+legacy router node (mutates the incoming state and returns all of it, which
+makes the `messages` reducer concatenate the list with itself) against the
+current node that returns only the keys it sets.
+
+Checks that a single-agent and a multi-agent invocation end with exactly the
+user message and the merged answer, then reports per invocation: time,
+peak memory allocated (tracemalloc) and the final messages length.
+
+Usage (from backend/):
+    python -m benchmarks.bench_graph_state [--iterations 2000]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from app.agents.orchestrator import AgentOrchestrator, AgentState, build_routing_prompt, parse_routing_reply
+from app.services.token_usage import token_ledger
+
+QUESTIONS = {
+    "single": ("What are the overdraft fees?", '{"agents": ["billing_agent"]}'),
+    "multi": ("I was charged twice and now the app won't let me log in", '{"agents": ["billing_agent", "technical_agent"]}'),
+}
+
+
+class StubRouterLLM:
+    """Answers the router prompt with a fixed agent list"""
+
+    def __init__(self, replies):
+        self.replies = {build_routing_prompt(question): reply for question, reply in replies}
+
+    def invoke(self, messages, **kwargs):
+        return AIMessage(content=self.replies[messages[-1].content])
+
+
+class StubAgent:
+    uses_retrieval = False
+
+    def __init__(self, name):
+        self.name = name
+
+    def process_query(self, query, **kwargs):
+        return f"{self.name} answer"
+
+
+class LegacyOrchestrator(AgentOrchestrator):
+    """Router node as it was: mutate the incoming state and return the whole of it"""
+
+    def _route_query(self, state):
+        user_message = state["messages"][-1].content
+        state["prefetch"] = self._start_speculative_retrieval(user_message)
+        routing_messages = [HumanMessage(content=build_routing_prompt(user_message))]
+        response = self.router_llm.invoke(routing_messages)
+        token_ledger.record("router", routing_messages, response)
+        state["next_agents"] = parse_routing_reply(response.content)
+        state["next_agent"] = ",".join(state["next_agents"])
+        self._cancel_unused_prefetch(state["prefetch"], state["next_agents"])
+        return state
+
+
+def build(cls):
+    """Orchestrator with stub models, skipping the API-key checks in __init__"""
+    orchestrator = cls.__new__(cls)
+    orchestrator.use_mock = False
+    orchestrator.router_llm = StubRouterLLM(QUESTIONS.values())
+    orchestrator.router_cache_point = False
+    orchestrator.router_call_timeout = False
+    orchestrator.billing_agent = StubAgent("billing_agent")
+    orchestrator.technical_agent = StubAgent("technical_agent")
+    orchestrator.policy_agent = StubAgent("policy_agent")
+    orchestrator.retrieval_agents = {}
+    orchestrator.prefetch_executor = None
+    orchestrator.graph = orchestrator._build_graph()
+    return orchestrator
+
+
+def invoke(orchestrator, question: str):
+    return orchestrator.graph.invoke(AgentState(
+        messages=[HumanMessage(content=question)],
+        next_agent="",
+        next_agents=[],
+        agent_responses={},
+        session_id="bench",
+        final_response="",
+        user_context="",
+        prefetch={},
+        route_probabilities={}
+    ))
+
+
+def check_messages(orchestrator):
+    """Each invocation should end with the user message and the merged answer - nothing repeated"""
+    for question, _ in QUESTIONS.values():
+        messages = invoke(orchestrator, question)["messages"]
+        assert [type(m) for m in messages] == [HumanMessage, AIMessage], \
+            f"expected [user, answer], got {[type(m).__name__ for m in messages]}"
+        assert messages[0].content == question
+
+
+def measure(orchestrator, question: str, iterations: int) -> dict:
+    for _ in range(20):
+        invoke(orchestrator, question)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        invoke(orchestrator, question)
+    elapsed = time.perf_counter() - start
+
+    # Peak traced memory during one (warm) invocation
+    tracemalloc.start()
+    final_state = invoke(orchestrator, question)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "us_per_invoke": elapsed / iterations * 1e6,
+        "peak_kb": peak / 1024,
+        "messages": len(final_state["messages"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    current, legacy = build(AgentOrchestrator), build(LegacyOrchestrator)
+    check_messages(current)
+    print("✓ Messages are not duplicated: each invocation ends with [user message, answer]")
+
+    print(f"\n{'router node':<14} {'question':<8} {'µs/invoke':>10} {'peak KB':>8} {'messages':>9}")
+    for name, orchestrator in (("partial", current), ("legacy", legacy)):
+        for kind, (question, _) in QUESTIONS.items():
+            r = measure(orchestrator, question, args.iterations)
+            print(f"{name:<14} {kind:<8} {r['us_per_invoke']:>10.1f} {r['peak_kb']:>8.1f} {r['messages']:>9}")
+
+
+if __name__ == "__main__":
+    main()
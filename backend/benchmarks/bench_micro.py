@@ -0,0 +1,273 @@
+"""
+Micro-benchmarks for the CPU-side hot paths of a chat request
+Runs offline (no API key, no vector store): LLM calls are replaced by a stub
+that returns immediately, so only the work done around them is timed.
+
+Cases:
+  routing.determine_category   MockAgent keyword routing of all 60 labeled questions
+  prompt.billing_agent         BillingAgent.process_query prompt assembly
+  prompt.technical_agent       TechnicalSupportAgent.process_query with 4 retrieved docs
+  prompt.policy_agent          PolicyComplianceAgent.process_query with the full static_context
+  sse.encode_response          frame a ~300-word answer and encode each frame as an SSE event
+  ingest.chunk_document        DataIngestionPipeline.chunk_document on all four mock documents
+  schema.chat_request          ChatRequest validation of a request with a structured context
+
+Each case is timed with timeit (auto-ranged loop count, --repeats runs) and
+reported in microseconds per call as the median and fastest run.
+
+Usage (from backend/):
+    python -m benchmarks.bench_micro [--filter prompt] [--output results.json]
+    python -m benchmarks.bench_micro --save-baseline          # writes benchmarks/baselines/micro.json
+    python -m benchmarks.bench_micro --compare [--threshold 0.20]
+
+--compare exits with status 1 when any case's fastest run is slower than the
+baseline by more than the threshold. Baselines are machine-specific and are
+not committed; save one on the machine you compare on.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Offline by design: without a key the agents skip the LLM and vector store
+os.environ.pop("OPENAI_API_KEY", None)
+
+from langchain_core.messages import AIMessage
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "micro.json"
+
+# name -> setup function returning the zero-argument callable to time
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class StubLLM:
+    """Returns a fixed reply so prompt assembly is all that gets timed"""
+
+    def __init__(self, reply: str = "Here is what you can do."):
+        self.reply = reply
+
+    def invoke(self, messages, **kwargs):
+        return AIMessage(content=self.reply)
+
+
+def load_questions() -> List[str]:
+    with open(BENCH_DIR / "routing_questions.json", "r", encoding="utf-8") as f:
+        return [item["question"] for item in json.load(f)]
+
+
+# Every call does identical work so timings don't depend on the loop count
+QUESTION = "How much should I save each month to build an emergency fund?"
+
+
+@benchmark("routing.determine_category")
+def bench_determine_category():
+    from app.agents.mock_agent import mock_agent
+    questions = load_questions()
+    return lambda: [mock_agent.determine_category(question) for question in questions]
+
+
+@benchmark("prompt.billing_agent")
+def bench_billing_prompt():
+    from app.agents.billing_agent import BillingAgent
+    agent = BillingAgent()
+    agent.llm = StubLLM()
+
+    def run():
+        # The billing agent logs every call; keep that out of the terminal
+        with contextlib.redirect_stdout(io.StringIO()):
+            return agent.process_query(QUESTION, "bench-session")
+    return run
+
+
+@benchmark("prompt.technical_agent")
+def bench_technical_prompt():
+    from app.agents.technical_support_agent import TechnicalSupportAgent
+    from app.services.ingestion import DOCUMENTS_DIR
+    agent = TechnicalSupportAgent()
+    agent.llm = StubLLM()
+    text = (DOCUMENTS_DIR / "technical_faqs.txt").read_text(encoding="utf-8")
+    docs = [text[i:i + 1200] for i in range(0, 4800, 1200)]
+    return lambda: agent.process_query(QUESTION, context_docs=docs)
+
+
+@benchmark("prompt.policy_agent")
+def bench_policy_prompt():
+    from app.agents.policy_agent import PolicyComplianceAgent
+    agent = PolicyComplianceAgent()
+    agent.llm = StubLLM()
+    return lambda: agent.process_query(QUESTION)
+
+
+@benchmark("sse.encode_response")
+def bench_sse_encoding():
+    from app.services.stream_writer import frame_coalescer, sse_event
+    from benchmarks.bench_sse_frames import sample_response
+    text = sample_response(300)
+
+    def run():
+        # Same frames chat_frames yields, encoded as generate_chat_stream does
+        events = [sse_event({"content": chunk, "agent": "billing_agent", "done": False})
+                  for chunk in frame_coalescer.frames(text)]
+        events.append(sse_event({"content": "", "agent": "billing_agent", "done": True}))
+        return events
+    return run
+
+
+@benchmark("ingest.chunk_document")
+def bench_chunk_document():
+    from app.services.ingestion import DOCUMENTS_DIR, DataIngestionPipeline
+    pipeline = DataIngestionPipeline()
+    documents = [(path.read_text(encoding="utf-8"), path.name)
+                 for path in sorted(DOCUMENTS_DIR.glob("*.txt"))]
+    return lambda: [pipeline.chunk_document(text, source, "bench") for text, source in documents]
+
+
+@benchmark("schema.chat_request")
+def bench_chat_request():
+    from app.models.schemas import ChatRequest
+    payload = {
+        "message": QUESTION,
+        "session_id": "session-1234",
+        "user_id": "user-42",
+        "context": {
+            "total_balance": 12543.75,
+            "balance_change_pct": 2.4,
+            "saved_this_month": 450.0,
+            "savings_goal": 800.0,
+            "rewards_points": 5200,
+            "rewards_tier": "Gold",
+            "active_goals": 3,
+            "premium": True,
+        },
+        "include_usage": True,
+    }
+    return lambda: ChatRequest.model_validate(payload)
+
+
+def measure(fn: Callable[[], object], repeats: int) -> Dict:
+    """Microseconds per call over `repeats` auto-ranged runs"""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    runs = [total / loops * 1e6 for total in timer.repeat(repeat=repeats, number=loops)]
+    return {
+        "median_us": statistics.median(runs),
+        "min_us": min(runs),
+        "stdev_us": statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(names: List[str], repeats: int) -> Dict:
+    results = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        fn()  # warm caches and lazy imports outside the timed runs
+        results[name] = measure(fn, repeats)
+        print(f"  {name:<30} {results[name]['median_us']:>12.2f} µs  (min {results[name]['min_us']:.2f})")
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Print current vs baseline timings; return the names that regressed
+    Uses the fastest run: scheduler noise only ever adds time, so the minimum
+    is far steadier between runs than the median on a shared machine
+    """
+    regressions = []
+    print(f"\nBaseline: commit {baseline['meta'].get('commit')} at {baseline['meta'].get('timestamp')}")
+    print(f"{'case':<30} {'baseline µs':>12} {'current µs':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<30} {'-':>12} {result['min_us']:>12.2f} {'new':>8}")
+            continue
+        change = result["min_us"] / before["min_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ❌ regression"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  ✅ faster"
+        print(f"{name:<30} {before['min_us']:>12.2f} {result['min_us']:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--save-baseline", nargs="?", type=Path, const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"write the results as the baseline (default {DEFAULT_BASELINE.relative_to(BENCH_DIR.parent)})")
+    parser.add_argument("--compare", nargs="?", type=Path, const=DEFAULT_BASELINE, metavar="PATH",
+                        help="compare against a baseline and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="relative slowdown of the fastest run that counts as a regression (default 0.20)")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        raise SystemExit(f"No benchmark matches {args.filter!r}; available: {', '.join(BENCHMARKS)}")
+
+    print(f"Running {len(names)} micro-benchmarks ({args.repeats} repeats each)")
+    current = run_suite(names, args.repeats)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved results to {path}")
+
+    if args.compare:
+        if not args.compare.exists():
+            raise SystemExit(f"No baseline at {args.compare}; create one with --save-baseline")
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Prompt-cache prefix check
+Builds the router, policy and technical prompts for the 60 labeled questions
+(stub LLM, half of them with a user profile) and reports how many leading
+tokens are byte-identical across all of them, i.e. what a provider prefix
+cache can serve. OpenAI caches prompts from 1,024 tokens in 128-token steps.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt_prefix
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Offline by design: without a key the agents skip the LLM and vector store
+os.environ.pop("OPENAI_API_KEY", None)
+
+from langchain_core.messages import AIMessage
+from langchain_openai.chat_models.base import _convert_message_to_dict
+from app.agents.orchestrator import build_routing_messages
+from app.agents.policy_agent import PolicyComplianceAgent
+from app.agents.technical_support_agent import TechnicalSupportAgent
+from app.services.token_usage import count_tokens
+
+BENCH_DIR = Path(__file__).resolve().parent
+OPENAI_MIN_CACHED = 1024
+OPENAI_CACHE_STEP = 128
+PROFILE = "USER PROFILE:\n- Total balance: $12,543.75\n- Rewards: 5,200 points (Gold)\n"
+
+
+class CapturingLLM:
+    """Keeps every prompt it is sent"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages, **kwargs):
+        self.prompts.append(messages)
+        return AIMessage(content="ok")
+
+
+def serialize(messages) -> str:
+    """The messages as they go over the wire to OpenAI"""
+    return json.dumps([_convert_message_to_dict(message) for message in messages], ensure_ascii=False)
+
+
+def cacheable(prefix_tokens: int) -> int:
+    if prefix_tokens < OPENAI_MIN_CACHED:
+        return 0
+    return prefix_tokens // OPENAI_CACHE_STEP * OPENAI_CACHE_STEP
+
+
+def main():
+    with open(BENCH_DIR / "routing_questions.json", "r", encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+
+    prompts = {"router": [serialize(build_routing_messages(question)) for question in questions]}
+
+    policy = PolicyComplianceAgent()
+    policy.llm = CapturingLLM()
+    technical = TechnicalSupportAgent()
+    technical.llm = CapturingLLM()
+    for i, question in enumerate(questions):
+        profile = PROFILE if i % 2 else None
+        policy.process_query(question, user_context=profile)
+        technical.process_query(question, user_context=profile, context_docs=[f"Doc {i}: steps for {question}"])
+    prompts["policy_agent"] = [serialize(messages) for messages in policy.llm.prompts]
+    prompts["technical_agent"] = [serialize(messages) for messages in technical.llm.prompts]
+
+    print(f"{'prompt':<16} {'avg tokens':>10} {'stable prefix':>14} {'OpenAI-cacheable':>17}")
+    for name, texts in prompts.items():
+        prefix_tokens = count_tokens(os.path.commonprefix(texts))
+        average = sum(count_tokens(text) for text in texts) / len(texts)
+        print(f"{name:<16} {average:>10.0f} {prefix_tokens:>14} {cacheable(prefix_tokens):>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Routing evaluation: accuracy vs latency vs cost for each router implementation
+Runs the labeled questions in routing_questions.json (billing, technical,
+policy and ambiguous / multi-intent cases) through every available router
+and reports accuracy, multi-intent coverage, how often the router asked a
+clarifying question instead of routing, a confusion matrix, p50/p99 routing
+latency and estimated cost per 1k requests.
+
+Routers:
+  keyword         MockAgent.determine_category (the speculative-retrieval prior)
+  stub            the orchestrator's router prompt and routing decision around a
+                  deterministic stand-in model (whole-word keyword scores as the
+                  JSON reply and logprobs, nominal latency, gpt-4o-mini prices),
+                  so the LLM path runs without recordings or API keys
+  recorded:NAME   the orchestrator's router prompt and routing decision, with LLM
+                  replies, logprobs, latencies and token counts replayed from
+                  benchmarks/recordings/router_NAME.json (no API key needed)
+
+Recordings are captured from a live model with --record, which also reports
+on that live run. A recording made with an older router prompt is skipped.
+
+Usage (from backend/):
+    python -m benchmarks.bench_routing [--latency-scale 1.0] [--json results.json]
+    python -m benchmarks.bench_routing --record gpt-4o-mini       # needs OPENAI_API_KEY
+    python -m benchmarks.bench_routing --record claude-3-haiku    # needs AWS credentials
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from app.agents.mock_agent import mock_agent
+from app.agents.orchestrator import AgentOrchestrator, build_openai_router_llm, build_routing_prompt
+from app.services.model_policy import ROUTER_MAX_TOKENS
+from app.services.token_usage import usage_from_response
+
+BENCH_DIR = Path(__file__).resolve().parent
+QUESTIONS_PATH = BENCH_DIR / "routing_questions.json"
+RECORDINGS_DIR = BENCH_DIR / "recordings"
+AGENTS = ["billing_agent", "technical_agent", "policy_agent"]
+
+# List prices in USD per 1M (input, output) tokens - update when they change
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "claude-3-haiku": (0.25, 1.25),
+}
+
+# Nominal round trip of the stub model (not a measurement of any provider)
+STUB_LATENCY_MS = 300.0
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class Router:
+    """
+    Pluggable router: route() returns (agents in priority order, prompt tokens, completion tokens)
+    No agents means the router asked a clarifying question
+    """
+
+    name = "router"
+    prices = (0.0, 0.0)
+
+    def route(self, question: str):
+        raise NotImplementedError
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.prices[0] + completion_tokens * self.prices[1]) / 1e6
+
+
+class KeywordRouter(Router):
+    name = "keyword"
+
+    def route(self, question: str):
+        category = mock_agent.determine_category(question)
+        # "general" gets the orchestrator's fallback agent
+        agent = f"{category}_agent" if category != "general" else "billing_agent"
+        return [agent], 0, 0
+
+
+class LLMRouter(Router):
+    """The orchestrator's router prompt and routing decision around any chat model"""
+
+    def __init__(self, name: str, llm, prices=(0.0, 0.0)):
+        self.name = name
+        self.llm = llm
+        self.prices = prices
+
+    def route(self, question: str):
+        messages = [HumanMessage(content=build_routing_prompt(question))]
+        response = self.llm.invoke(messages)
+        usage = usage_from_response(messages, response)
+        agents, _ = AgentOrchestrator._decide_route(response)
+        return agents, usage["prompt_tokens"], usage["completion_tokens"]
+
+
+class RecordedLLM:
+    """Replays recorded router replies, sleeping for the recorded latency times `latency_scale`"""
+
+    def __init__(self, replies: Dict[str, Dict], latency_scale: float = 1.0):
+        self.replies = replies
+        self.latency_scale = latency_scale
+
+    def invoke(self, messages):
+        reply = self.replies[prompt_key(messages[-1].content)]
+        time.sleep(reply["latency_ms"] / 1000 * self.latency_scale)
+        return AIMessage(content=reply["reply"], response_metadata={"logprobs": reply.get("logprobs")}, usage_metadata={
+            "input_tokens": reply["prompt_tokens"],
+            "output_tokens": reply["completion_tokens"],
+            "total_tokens": reply["prompt_tokens"] + reply["completion_tokens"],
+        })
+
+
+class StubLLM:
+    """
+    Deterministic stand-in for the router model: scores the question by
+    whole-word keyword matches and answers in the router's JSON format with
+    logprobs for the first label, after a fixed latency
+    """
+
+    KEYWORDS = {
+        "billing_agent": mock_agent.billing_keywords,
+        "technical_agent": mock_agent.technical_keywords,
+        "policy_agent": mock_agent.policy_keywords,
+    }
+
+    def __init__(self, latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+
+    def invoke(self, messages):
+        question = messages[-1].content.split("USER QUESTION: ", 1)[-1].split("\n", 1)[0].lower()
+        scores = {agent: sum(1 for keyword in keywords if re.search(rf"\b{re.escape(keyword)}", question))
+                  for agent, keywords in self.KEYWORDS.items()}
+        agents = sorted((agent for agent in AGENTS if scores[agent]), key=lambda agent: -scores[agent])
+        time.sleep(STUB_LATENCY_MS / 1000 * self.latency_scale)
+        reply = json.dumps({"agents": agents})
+        if not agents:
+            return AIMessage(content=reply)
+
+        # One token per label, with every agent as an alternative weighted by its score
+        total = sum(scores[agent] + 1 for agent in AGENTS)
+        alternatives = [{"token": agent, "logprob": math.log((scores[agent] + 1) / total)} for agent in AGENTS]
+        head, tail = reply.split(agents[0], 1)
+        tokens = [{"token": head, "logprob": 0.0},
+                  {"token": agents[0], "logprob": math.log((scores[agents[0]] + 1) / total), "top_logprobs": alternatives},
+                  {"token": tail, "logprob": 0.0}]
+        return AIMessage(content=reply, response_metadata={"logprobs": {"content": tokens}})
+
+
+class RecordingLLM:
+    """Wraps a live model and keeps every reply for replay"""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.replies: Dict[str, Dict] = {}
+
+    def invoke(self, messages):
+        start = time.perf_counter()
+        response = self.llm.invoke(messages)
+        latency_ms = (time.perf_counter() - start) * 1000
+        usage = usage_from_response(messages, response)
+        prompt = messages[-1].content
+        self.replies[prompt_key(prompt)] = {
+            "question": prompt.split("USER QUESTION: ", 1)[-1].split("\n", 1)[0],
+            "reply": response.content,
+            "logprobs": response.response_metadata.get("logprobs"),
+            "latency_ms": round(latency_ms, 1),
+            **usage,
+        }
+        return response
+
+
+def live_llm(name: str):
+    """The router models the orchestrator uses"""
+    if name == "gpt-4o-mini":
+        return build_openai_router_llm(name)
+    if name == "claude-3-haiku":
+        import os
+        from langchain_community.chat_models import BedrockChat
+        return BedrockChat(
+            model_id="anthropic.claude-3-haiku-20240307-v1:0",
+            model_kwargs={"temperature": 0.1, "max_tokens": ROUTER_MAX_TOKENS},
+            region_name=os.getenv("AWS_DEFAULT_REGION", "us-east-1"),
+        )
+    raise SystemExit(f"Unknown model {name!r}; choose from {', '.join(PRICES)}")
+
+
+def recorded_routers(directory: Path, questions: List[Dict], latency_scale: float) -> List[Router]:
+    routers = []
+    needed = {prompt_key(build_routing_prompt(q["question"])) for q in questions}
+    for path in sorted(directory.glob("router_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            recording = json.load(f)
+        missing = needed - set(recording["replies"])
+        if missing:
+            print(f"Skipping {path.name}: {len(missing)} questions were not recorded with the current "
+                  f"prompt (re-run with --record {recording['model']})")
+            continue
+        routers.append(LLMRouter(f"recorded:{recording['model']}", RecordedLLM(recording["replies"], latency_scale),
+                                 PRICES.get(recording["model"], (0.0, 0.0))))
+    return routers
+
+
+def evaluate(router: Router, questions: List[Dict]) -> Dict:
+    latencies, costs = [], []
+    per_category = {}
+    confusion = Counter()
+    correct = covered = multi = clarified = 0
+    for item in questions:
+        start = time.perf_counter()
+        agents, prompt_tokens, completion_tokens = router.route(item["question"])
+        latencies.append(time.perf_counter() - start)
+        costs.append(router.cost(prompt_tokens, completion_tokens))
+
+        clarified += not agents
+        hit = bool(agents) and agents[0] in item["expected"]
+        correct += hit
+        stats = per_category.setdefault(item["category"], [0, 0])
+        stats[0] += hit
+        stats[1] += 1
+        if item["category"] != "ambiguous" and agents:
+            confusion[(item["expected"][0], agents[0])] += 1
+        if item.get("multi_intent"):
+            multi += 1
+            covered += set(item["expected"]) <= set(agents)
+
+    return {
+        "router": router.name,
+        "accuracy": correct / len(questions),
+        "by_category": {category: hits / total for category, (hits, total) in per_category.items()},
+        "multi_intent_coverage": covered / multi if multi else None,
+        "clarify_rate": clarified / len(questions),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "cost_per_1k_usd": float(np.mean(costs) * 1000),
+        "confusion": {expected: {predicted: confusion[(expected, predicted)] for predicted in AGENTS}
+                      for expected in AGENTS},
+    }
+
+
+def print_report(results: List[Dict]):
+    categories = ["billing", "technical", "policy", "ambiguous"]
+    print(f"\n{'router':<24} {'accuracy':>9} " + " ".join(f"{c:>10}" for c in categories) +
+          f" {'multi':>6} {'clarify':>8} {'p50 ms':>9} {'p99 ms':>9} {'$/1k req':>9}")
+    for r in results:
+        by_category = " ".join(f"{r['by_category'].get(c, 0):>10.0%}" for c in categories)
+        coverage = f"{r['multi_intent_coverage']:.0%}" if r["multi_intent_coverage"] is not None else "-"
+        print(f"{r['router']:<24} {r['accuracy']:>9.1%} {by_category} {coverage:>6} {r['clarify_rate']:>8.0%} "
+              f"{r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['cost_per_1k_usd']:>9.4f}")
+
+    for r in results:
+        print(f"\nConfusion matrix - {r['router']} (rows: expected, columns: predicted; routed unambiguous questions)")
+        print(f"{'':<16}" + "".join(f"{a:>16}" for a in AGENTS))
+        for expected in AGENTS:
+            print(f"{expected:<16}" + "".join(f"{r['confusion'][expected][p]:>16}" for p in AGENTS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", metavar="MODEL", help=f"route with a live model and save a recording ({', '.join(PRICES)})")
+    parser.add_argument("--recordings", type=Path, default=RECORDINGS_DIR)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="multiply replayed LLM latencies (0 = measure parsing overhead only)")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    with open(QUESTIONS_PATH, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    routers: List[Router] = [KeywordRouter()]
+    recording: Optional[RecordingLLM] = None
+    if args.record:
+        recording = RecordingLLM(live_llm(args.record))
+        routers.append(LLMRouter(f"live:{args.record}", recording, PRICES[args.record]))
+    else:
+        routers.append(LLMRouter("stub", StubLLM(args.latency_scale), PRICES["gpt-4o-mini"]))
+        routers.extend(recorded_routers(args.recordings, questions, args.latency_scale))
+
+    results = [evaluate(router, questions) for router in routers]
+    print(f"{len(questions)} questions from {QUESTIONS_PATH.name}")
+    print_report(results)
+
+    if recording is not None:
+        args.recordings.mkdir(parents=True, exist_ok=True)
+        path = args.recordings / f"router_{args.record}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"model": args.record, "recorded_at": datetime.now().isoformat(),
+                       "replies": recording.replies}, f, indent=2, ensure_ascii=False)
+        print(f"\nSaved {len(recording.replies)} replies to {path}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
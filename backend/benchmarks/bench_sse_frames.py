@@ -0,0 +1,97 @@
+"""
+SSE framing micro-benchmark
+Compares the legacy 3-word framing (json.dumps per chunk, 10 ms sleep per
+frame, string events re-wrapped by sse_starlette) against the adaptive
+FrameCoalescer with the fast frame encoder
+
+Usage (from backend/):
+    python -m benchmarks.bench_sse_frames [--words 300] [--iterations 2000]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sse_starlette.sse import ensure_bytes
+from app.services.stream_writer import FrameCoalescer, sse_event
+
+LEGACY_CHUNK_WORDS = 3
+LEGACY_SLEEP = 0.01
+
+
+def sample_response(words: int) -> str:
+    """Markdown-ish answer of roughly the given word count"""
+    paragraph = (
+        "💰 Great question! Your **monthly maintenance fee** is $0 when you keep a $500+ balance. "
+        "Out-of-network ATM withdrawals cost $2.50 each, and overdraft protection is $35 per occurrence.\n\n"
+    )
+    text = ""
+    while len(text.split()) < words:
+        text += paragraph
+    return " ".join(text.split(" ")[:words])
+
+
+def legacy_events(text: str, agent: str):
+    """Frames exactly as the old generate_chat_stream produced them"""
+    words = text.split()
+    for i in range(0, len(words), LEGACY_CHUNK_WORDS):
+        chunk = " ".join(words[i:i + LEGACY_CHUNK_WORDS])
+        if i + LEGACY_CHUNK_WORDS < len(words):
+            chunk += " "
+        yield f"data: {json.dumps({'content': chunk, 'agent': agent, 'done': False})}\n\n"
+    yield f"data: {json.dumps({'content': '', 'agent': agent, 'done': True})}\n\n"
+
+
+def coalesced_events(text: str, agent: str, coalescer: FrameCoalescer):
+    for chunk in coalescer.frames(text):
+        yield sse_event({"content": chunk, "agent": agent, "done": False})
+    yield sse_event({"content": "", "agent": agent, "done": True})
+
+
+def measure(name: str, make_events, iterations: int, sleep_per_frame: float) -> dict:
+    # Wire bytes as EventSourceResponse would send them
+    wire = [ensure_bytes(event, "\r\n") for event in make_events()]
+    frames = len(wire)
+
+    start = time.process_time()
+    for _ in range(iterations):
+        for event in make_events():
+            ensure_bytes(event, "\r\n")
+    cpu = (time.process_time() - start) / iterations
+
+    return {
+        "name": name,
+        "frames": frames,
+        "wire_bytes": sum(len(chunk) for chunk in wire),
+        "cpu_us_per_response": round(cpu * 1e6, 1),
+        "added_delay_ms": round(frames * sleep_per_frame * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    text = sample_response(args.words)
+    agent = "billing_agent"
+    coalescer = FrameCoalescer()
+
+    results = [
+        measure("legacy", lambda: legacy_events(text, agent), args.iterations, LEGACY_SLEEP),
+        measure("coalesced", lambda: coalesced_events(text, agent, coalescer), args.iterations, 0.0),
+    ]
+
+    print(f"Response: {args.words} words, {len(text.encode('utf-8'))} bytes")
+    print(f"{'writer':<10} {'frames':>7} {'wire bytes':>11} {'cpu µs/resp':>12} {'sleep ms':>9}")
+    for r in results:
+        print(f"{r['name']:<10} {r['frames']:>7} {r['wire_bytes']:>11} {r['cpu_us_per_response']:>12} {r['added_delay_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Vector search benchmark: Chroma (HNSW) vs the NumPy exact-search index
+Uses random unit vectors (OpenAI embedding width) so no API key is needed;
+query embedding time is the same for both engines and is excluded.
+Reports p50/p99 search latency, recall@k of Chroma against exact search,
+build time and resident memory added by each index.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_search [--sizes 1000,10000,100000] [--dim 1536] [--queries 200]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.numpy_index import NumpyIndex
+
+CHROMA_BATCH = 5000
+DOC_TYPES = ["billing", "technical", "financial_planning", "policy"]
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (Linux), in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def percentile(samples, pct):
+    return float(np.percentile(np.asarray(samples) * 1000, pct))
+
+
+def time_queries(search, queries):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def bench_numpy(vectors, texts, metadatas, queries, k, dtype, filter_dict):
+    gc.collect()
+    before = rss_mb()
+    start = time.perf_counter()
+    index = NumpyIndex(vectors.shape[1], dtype)
+    index.add(vectors, texts, metadatas)
+    build = time.perf_counter() - start
+    memory = rss_mb() - before
+
+    latencies, results = time_queries(lambda q: [row for row, _ in index.search(q, k)], queries)
+    filtered, _ = time_queries(lambda q: index.search(q, k, filter_dict), queries)
+    return {
+        "engine": f"numpy-{dtype}",
+        "build_s": build,
+        "memory_mb": memory,
+        "index_mb": index.nbytes / 1e6,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "filtered_p50_ms": percentile(filtered, 50),
+        "results": results,
+    }
+
+
+def bench_chroma(vectors, texts, metadatas, queries, k, filter_dict):
+    import chromadb
+
+    gc.collect()
+    before = rss_mb()
+    with tempfile.TemporaryDirectory() as path:
+        client = chromadb.PersistentClient(path=path)
+        collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), CHROMA_BATCH):
+            end = offset + CHROMA_BATCH
+            collection.add(
+                ids=[str(i) for i in range(offset, min(end, len(vectors)))],
+                embeddings=vectors[offset:end].tolist(),
+                documents=texts[offset:end],
+                metadatas=metadatas[offset:end],
+            )
+        build = time.perf_counter() - start
+        memory = rss_mb() - before
+
+        def search(q, where=None):
+            hits = collection.query(query_embeddings=[q.tolist()], n_results=k, where=where)
+            return [int(i) for i in hits["ids"][0]]
+
+        latencies, results = time_queries(search, queries)
+        filtered, _ = time_queries(lambda q: search(q, filter_dict), queries)
+        del collection, client
+
+    return {
+        "engine": "chroma",
+        "build_s": build,
+        "memory_mb": memory,
+        "index_mb": None,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "filtered_p50_ms": percentile(filtered, 50),
+        "results": results,
+    }
+
+
+def recall(results, exact, k):
+    return float(np.mean([len(set(r) & set(e)) / k for r, e in zip(results, exact)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    filter_dict = {"type": "technical"}
+
+    print(f"{'chunks':>7} {'engine':<14} {'build s':>8} {'RSS MB':>7} {'index MB':>9} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'filt p50':>9} {'recall':>7}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        texts = [f"chunk {i}" for i in range(size)]
+        metadatas = [{"type": DOC_TYPES[i % len(DOC_TYPES)], "chunk_index": i} for i in range(size)]
+        # Queries near existing rows, like real questions near their answer chunk
+        picks = rng.integers(0, size, args.queries)
+        queries = vectors[picks] + 0.5 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        runs = [bench_numpy(vectors, texts, metadatas, queries, args.k, dtype, filter_dict)
+                for dtype in ("float32", "float16", "int8")]
+        if not args.skip_chroma:
+            runs.append(bench_chroma(vectors, texts, metadatas, queries, args.k, filter_dict))
+
+        exact = runs[0]["results"]
+        for run in runs:
+            index_mb = f"{run['index_mb']:.1f}" if run["index_mb"] is not None else "-"
+            print(f"{size:>7} {run['engine']:<14} {run['build_s']:>8.2f} {run['memory_mb']:>7.0f} {index_mb:>9} "
+                  f"{run['p50_ms']:>7.3f} {run['p99_ms']:>7.3f} {run['filtered_p50_ms']:>9.3f} "
+                  f"{recall(run['results'], exact, args.k):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ set -o errexit
 pip install --upgrade pip
 pip install -r requirements.txt
 
-# Run data ingestion for ChromaDB
+# Run data ingestion for ChromaDB (also regenerates precomputed quick-question answers)
 python ingest_data.py
 
 echo "Build completed successfully!"
@@ -0,0 +1,56 @@
+"""
+Answer Materialization Job for SmartFinance AI
+Generates answers for the canonical quick questions offline and stores them
+with the knowledge-base version so the API can serve them from memory
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Add app directory to path
+sys.path.append(str(Path(__file__).parent))
+
+# Load environment variables
+load_dotenv()
+
+from app.services.answer_cache import (
+    CANONICAL_QUESTIONS_PATH,
+    PRECOMPUTED_ANSWERS_PATH,
+    is_stale,
+    kb_version,
+    load_canonical_questions,
+    materialize_answers,
+)
+
+
+def run(force: bool = False):
+    """Regenerate the answer table if the documents or question list changed"""
+    questions = load_canonical_questions()
+    if not force and not is_stale(questions=questions):
+        print(f"Precomputed answers are up to date (kb {kb_version()})")
+        return
+
+    print(f"Materializing {len(questions)} canonical answers from {CANONICAL_QUESTIONS_PATH}...")
+    table = materialize_answers(questions)
+    print(f"Wrote {len(table['answers'])} answers to {PRECOMPUTED_ANSWERS_PATH} (kb {table['kb_version']})")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--force", action="store_true", help="Regenerate even if the table is up to date")
+    args = parser.parse_args()
+
+    if not os.getenv("OPENAI_API_KEY"):
+        print("ERROR: OPENAI_API_KEY not found in environment variables")
+        print("Please create a .env file with your OpenAI API key")
+        sys.exit(1)
+
+    run(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import { MessageCircle, Send, Bot, User, Volume2, VolumeX } from 'lucide-react'
 import { cn } from '@/lib/utils'
 import { AuthGuard } from '@/components/AuthGuard'
 import { API_ENDPOINTS, API_URL } from '@/lib/config'
+import { ChatSocket } from '@/lib/chatSocket'
+import { UserContext, diffUserContext, loadUserContext } from '@/lib/userContext'
 
 interface Message {
   role: 'user' | 'assistant'
@@ -28,7 +30,11 @@ export default function SupportPage() {
   const [highContrast, setHighContrast] = useState(false)
   const [fontSize, setFontSize] = useState<'normal' | 'large' | 'xlarge'>('normal')
   const messagesEndRef = useRef<HTMLDivElement>(null)
-  const [sessionId] = useState(() => `session-${Date.now()}`)
+  // Unguessable: the backend caches the user's financial profile under this id
+  const [sessionId] = useState(() => `session-${crypto.randomUUID()}`)
+  const chatSocketRef = useRef<ChatSocket | null>(null)
+  // Profile the backend has cached for this session (null = must send it in full)
+  const sentContextRef = useRef<UserContext | null>(null)
 
   // Load accessibility settings from profile and check backend connection
   useEffect(() => {
@@ -50,24 +56,52 @@ export default function SupportPage() {
       }
     }
     
-    // Initial backend connection check
-    const checkBackend = async () => {
-      try {
-        const response = await fetch(API_ENDPOINTS.health, {
-          method: 'GET',
-          signal: AbortSignal.timeout(5000)
-        })
-        setBackendConnected(response.ok)
-      } catch (error) {
-        setBackendConnected(false)
-      }
+    // One long-lived WebSocket carries every chat turn; the backend pushes
+    // health signals over it, so no periodic /health polling is needed
+    const socket = new ChatSocket(sessionId)
+    const unsubscribe = socket.onHealth((connected) => {
+      setBackendConnected(connected)
+      // The backend may have restarted and lost its cached profile
+      if (!connected) sentContextRef.current = null
+    })
+    socket.connect()
+    chatSocketRef.current = socket
+    return () => {
+      unsubscribe()
+      socket.close()
+      chatSocketRef.current = null
     }
-    
-    checkBackend()
-    // Recheck periodically (but not too aggressively)
-    const interval = setInterval(checkBackend, 90000) // Every 90 seconds
-    return () => clearInterval(interval)
-  }, [])
+  }, [sessionId])
+
+  // Stream one turn over the WebSocket, updating the last assistant message as frames arrive
+  const streamOverSocket = async (socket: ChatSocket, message: string, context: UserContext | null) => {
+    let assistantMessage = ''
+    let agentUsed = ''
+
+    const turn = socket.send(message, context, (frame) => {
+      if (!frame.content) return
+      assistantMessage += frame.content
+      agentUsed = frame.agent || agentUsed
+
+      setMessages(prev => {
+        const newMessages = [...prev]
+        const lastMessage = newMessages[newMessages.length - 1]
+        const updated: Message = { role: 'assistant', content: assistantMessage, agent: agentUsed }
+
+        if (lastMessage?.role === 'assistant') {
+          newMessages[newMessages.length - 1] = updated
+        } else {
+          newMessages.push(updated)
+        }
+        return newMessages
+      })
+    })
+
+    await turn.done
+    if (audioEnabled && assistantMessage) {
+      speakText(assistantMessage)
+    }
+  }
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -164,25 +198,21 @@ export default function SupportPage() {
     setIsLoading(true)
 
     try {
-      // Get real user data from localStorage or use defaults
-      const storedUserData = localStorage.getItem('userData')
-      const userData = storedUserData ? JSON.parse(storedUserData) : {
-        totalBalance: 1440000.00,
-        savedThisMonth: 2800.00,
-        savingsGoal: 5000.00,
-        rewardsPoints: 88000
-      }
-      
-      // Build user context for personalized AI responses
-      const userContext = `
-CURRENT USER FINANCIAL PROFILE:
-• Account Balance: $${userData.totalBalance.toLocaleString()} (${userData.balanceChange || 12}% this month)
-• Monthly Savings Goal: $${userData.savedThisMonth.toLocaleString()} of $${userData.savingsGoal.toLocaleString()} (${Math.round((userData.savedThisMonth / userData.savingsGoal) * 100)}% complete)
-• Rewards: ${userData.rewardsPoints.toLocaleString()} points (${userData.rewardsPoints >= 50000 ? 'Platinum' : userData.rewardsPoints >= 25000 ? 'Gold' : 'Silver'} Tier)
-• Active Goals: User has active savings goals
-• Premium Features: Full access enabled
-`
+      // Structured profile from localStorage; the backend caches it per
+      // session, so the socket only carries fields that changed
+      const profile = loadUserContext()
       
+      // Prefer the open WebSocket; fall back to a one-off SSE request
+      const socket = chatSocketRef.current
+      if (socket?.isOpen) {
+        const changes = diffUserContext(sentContextRef.current, profile)
+        await streamOverSocket(socket, currentInput, changes)
+        // Only a turn the server accepted merged the changes; a rejected one
+        // (error frame) throws above and the next turn diffs against the old profile
+        sentContextRef.current = profile
+        return
+      }
+
       // Try to use backend first with timeout
       const controller = new AbortController()
       const timeoutId = setTimeout(() => controller.abort(), 60000) // 60 second timeout for AI processing (GPT-4 can be slow)
@@ -195,7 +225,7 @@ CURRENT USER FINANCIAL PROFILE:
         body: JSON.stringify({
           message: currentInput,
           session_id: sessionId,
-          user_context: userContext,
+          context: profile,
         }),
         signal: controller.signal
       })
@@ -290,7 +320,11 @@ CURRENT USER FINANCIAL PROFILE:
             }
             
             // Break out of while loop when stream is complete
-            if (streamComplete) break
+            if (streamComplete) {
+              // The full profile reached the server with a turn it answered
+              sentContextRef.current = profile
+              break
+            }
           }
 
           // Process any remaining data in the buffer after stream ends
@@ -412,24 +446,29 @@ CURRENT USER FINANCIAL PROFILE:
           billing_agent: 'bg-blue-600 text-white border-2 border-blue-800',
           technical_agent: 'bg-purple-600 text-white border-2 border-purple-800',
           policy_agent: 'bg-green-600 text-white border-2 border-green-800',
+          general: 'bg-gray-600 text-white border-2 border-gray-800',
         }
       : {
           billing_agent: 'bg-blue-100 text-blue-700',
           technical_agent: 'bg-purple-100 text-purple-700',
           policy_agent: 'bg-green-100 text-green-700',
+          general: 'bg-gray-100 text-gray-700',
         }
 
     const agentNames: Record<string, string> = {
       billing_agent: 'Billing',
       technical_agent: 'Technical',
       policy_agent: 'Policy',
+      // Clarifying questions and answers no specialist handled
+      general: 'General',
     }
 
-    return (
-      <span className={cn('text-xs px-2 py-1 rounded-full font-medium', agentColors[agent])}>
-        {agentNames[agent] || agent}
+    // Multi-intent answers name several agents, e.g. "billing_agent,technical_agent"
+    return agent.split(',').map((name) => (
+      <span key={name} className={cn('text-xs px-2 py-1 rounded-full font-medium mr-1', agentColors[name])}>
+        {agentNames[name] || name}
       </span>
-    )
+    ))
   }
 
   const getFontSizeClass = () => {
@@ -6,6 +6,7 @@ import { Button } from '@/components/ui/button'
 import { Card, CardContent } from '@/components/ui/card'
 import { cn } from '@/lib/utils'
 import { API_ENDPOINTS, API_URL } from '@/lib/config'
+import { ChatSocket } from '@/lib/chatSocket'
 
 interface Message {
   role: 'user' | 'assistant'
@@ -28,25 +29,22 @@ export function FloatingAIButton() {
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const [sessionId] = useState(() => `floating-${Date.now()}`)
   const audioEnabledRef = useRef(audioEnabled) // Track audio state for immediate access
+  const chatSocketRef = useRef<ChatSocket | null>(null)
 
-  // Check backend connection
+  // Keep one WebSocket open while the chat is open; it also reports backend health
   useEffect(() => {
-    const checkBackend = async () => {
-      try {
-        const response = await fetch(API_ENDPOINTS.health, {
-          method: 'GET',
-          signal: AbortSignal.timeout(5000)
-        })
-        setBackendConnected(response.ok)
-      } catch (error) {
-        setBackendConnected(false)
-      }
-    }
-    
-    if (isOpen) {
-      checkBackend()
+    if (!isOpen) return
+
+    const socket = new ChatSocket(sessionId)
+    const unsubscribe = socket.onHealth(setBackendConnected)
+    socket.connect()
+    chatSocketRef.current = socket
+    return () => {
+      unsubscribe()
+      socket.close()
+      chatSocketRef.current = null
     }
-  }, [isOpen])
+  }, [isOpen, sessionId])
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -125,7 +123,33 @@ export function FloatingAIButton() {
     setIsLoading(true)
 
     try {
-      if (backendConnected) {
+      const socket = chatSocketRef.current
+      if (socket?.isOpen) {
+        let assistantMessage = ''
+        let detectedAgent = ''
+
+        const turn = socket.send(userMessage.content, null, (frame) => {
+          if (!frame.content) return
+          assistantMessage += frame.content
+          detectedAgent = frame.agent || detectedAgent
+
+          setMessages(prev => {
+            const newMessages = [...prev]
+            const updated: Message = { role: 'assistant', content: assistantMessage, agent: detectedAgent }
+            if (newMessages[newMessages.length - 1]?.role === 'assistant') {
+              newMessages[newMessages.length - 1] = updated
+            } else {
+              newMessages.push(updated)
+            }
+            return newMessages
+          })
+        }, 30000)
+
+        await turn.done
+        if (audioEnabled && assistantMessage) {
+          speakText(assistantMessage)
+        }
+      } else if (backendConnected) {
         const response = await fetch(API_ENDPOINTS.chatStream, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
@@ -244,14 +268,15 @@ export function FloatingAIButton() {
       policy_agent: { label: 'Policy', color: 'bg-green-500' }
     }
 
-    const config = agentConfig[agent]
-    if (!config) return null
+    // Multi-intent answers name several agents, e.g. "billing_agent,technical_agent"
+    const configs = agent.split(',').map((name) => agentConfig[name]).filter(Boolean)
+    if (configs.length === 0) return null
 
-    return (
-      <span className={`inline-block px-2 py-0.5 rounded text-xs text-white ${config.color} ml-2`}>
+    return configs.map((config) => (
+      <span key={config.label} className={`inline-block px-2 py-0.5 rounded text-xs text-white ${config.color} ml-2`}>
         {config.label}
       </span>
-    )
+    ))
   }
 
   return (
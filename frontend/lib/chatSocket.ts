@@ -0,0 +1,153 @@
+import { API_ENDPOINTS } from '@/lib/config'
+import type { UserContext } from '@/lib/userContext'
+
+// One frame of an assistant reply - same contract as the SSE stream
+export interface ChatFrame {
+  content: string
+  agent: string
+  done: boolean
+}
+
+export interface ChatTurn {
+  requestId: string
+  cancel: () => void
+  done: Promise<void>
+}
+
+interface PendingTurn {
+  onFrame: (frame: ChatFrame) => void
+  resolve: () => void
+  reject: (error: Error) => void
+  timeoutId: ReturnType<typeof setTimeout>
+}
+
+type HealthListener = (connected: boolean) => void
+
+const MAX_RECONNECT_DELAY = 30000
+
+/**
+ * Long-lived WebSocket to /api/chat/ws carrying every turn of one session.
+ * Turns are tagged with request IDs so they can overlap and be cancelled,
+ * and the server pushes health signals so the page does not need to poll.
+ */
+export class ChatSocket {
+  private socket: WebSocket | null = null
+  private turns = new Map<string, PendingTurn>()
+  private healthListeners = new Set<HealthListener>()
+  private reconnectDelay = 1000
+  private reconnectTimer: ReturnType<typeof setTimeout> | null = null
+  private closed = false
+  private nextId = 0
+
+  constructor(private sessionId: string) {}
+
+  get isOpen() {
+    return this.socket?.readyState === WebSocket.OPEN
+  }
+
+  connect() {
+    this.closed = false
+    const url = `${API_ENDPOINTS.chatSocket}?session_id=${encodeURIComponent(this.sessionId)}`
+    const socket = new WebSocket(url)
+    this.socket = socket
+
+    socket.onopen = () => {
+      this.reconnectDelay = 1000
+      this.notifyHealth(true)
+    }
+
+    socket.onmessage = (event) => {
+      let data: any
+      try {
+        data = JSON.parse(event.data)
+      } catch {
+        return
+      }
+
+      if (data.type === 'health') {
+        this.notifyHealth(data.status === 'healthy')
+        return
+      }
+
+      const turn = data.request_id ? this.turns.get(data.request_id) : undefined
+      if (!turn) return
+
+      if (data.type === 'chunk') {
+        turn.onFrame({ content: data.content, agent: data.agent, done: data.done })
+        if (data.done) this.finishTurn(data.request_id)
+      } else if (data.type === 'error' || data.type === 'cancelled') {
+        this.finishTurn(data.request_id, new Error(data.content || 'Request cancelled'))
+      }
+    }
+
+    socket.onclose = () => {
+      this.notifyHealth(false)
+      for (const requestId of Array.from(this.turns.keys())) {
+        this.finishTurn(requestId, new Error('Connection to AI backend lost'))
+      }
+      if (!this.closed) {
+        // Reconnect with exponential backoff
+        this.reconnectTimer = setTimeout(() => this.connect(), this.reconnectDelay)
+        this.reconnectDelay = Math.min(this.reconnectDelay * 2, MAX_RECONNECT_DELAY)
+      }
+    }
+  }
+
+  close() {
+    this.closed = true
+    if (this.reconnectTimer) clearTimeout(this.reconnectTimer)
+    this.socket?.close()
+    this.socket = null
+  }
+
+  onHealth(listener: HealthListener) {
+    this.healthListeners.add(listener)
+    return () => {
+      this.healthListeners.delete(listener)
+    }
+  }
+
+  // context carries only the profile fields that changed since the last turn
+  send(message: string, context: UserContext | null, onFrame: (frame: ChatFrame) => void, timeoutMs = 60000): ChatTurn {
+    const requestId = `${this.sessionId}-${++this.nextId}`
+
+    const done = new Promise<void>((resolve, reject) => {
+      const timeoutId = setTimeout(() => {
+        this.cancelTurn(requestId)
+        this.finishTurn(requestId, new Error('The AI request timed out (aborted)'))
+      }, timeoutMs)
+      this.turns.set(requestId, { onFrame, resolve, reject, timeoutId })
+    })
+
+    this.socket?.send(JSON.stringify({
+      type: 'chat',
+      request_id: requestId,
+      message,
+      context,
+    }))
+
+    return { requestId, cancel: () => this.cancelTurn(requestId), done }
+  }
+
+  private cancelTurn(requestId: string) {
+    if (this.isOpen && this.turns.has(requestId)) {
+      this.socket?.send(JSON.stringify({ type: 'cancel', request_id: requestId }))
+    }
+  }
+
+  private finishTurn(requestId: string, error?: Error) {
+    const turn = this.turns.get(requestId)
+    if (!turn) return
+    this.turns.delete(requestId)
+    clearTimeout(turn.timeoutId)
+    if (error) {
+      turn.reject(error)
+    } else {
+      turn.resolve()
+    }
+  }
+
+  private notifyHealth(connected: boolean) {
+    this.healthListeners.forEach((listener) => listener(connected))
+  }
+}
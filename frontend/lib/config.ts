@@ -6,5 +6,6 @@ export const API_ENDPOINTS = {
   health: `${API_URL}/health`,
   chatStream: `${API_URL}/api/chat/stream`,
   chat: `${API_URL}/api/chat`,
+  chatSocket: `${API_URL.replace(/^http/, 'ws')}/api/chat/ws`,
 }
 
@@ -0,0 +1,52 @@
+// Structured user profile sent with chat messages - mirrors UserContext in backend/app/models/schemas.py
+export interface UserContext {
+  total_balance?: number | null
+  balance_change_pct?: number | null
+  saved_this_month?: number | null
+  savings_goal?: number | null
+  rewards_points?: number | null
+  rewards_tier?: 'Silver' | 'Gold' | 'Platinum' | null
+  active_goals?: number | null
+  premium?: boolean | null
+}
+
+const DEFAULT_USER_DATA = {
+  totalBalance: 1440000.00,
+  savedThisMonth: 2800.00,
+  savingsGoal: 5000.00,
+  rewardsPoints: 88000,
+}
+
+// Build the profile from the user data stored by the dashboard (or demo defaults)
+export function loadUserContext(): UserContext {
+  const storedUserData = localStorage.getItem('userData')
+  const userData = storedUserData ? JSON.parse(storedUserData) : DEFAULT_USER_DATA
+  const goals = localStorage.getItem('savingsGoals')
+
+  return {
+    total_balance: userData.totalBalance,
+    balance_change_pct: userData.balanceChange ?? 12,
+    saved_this_month: userData.savedThisMonth,
+    savings_goal: userData.savingsGoal,
+    rewards_points: userData.rewardsPoints,
+    active_goals: goals ? JSON.parse(goals).length : null,
+    premium: true,
+  }
+}
+
+/**
+ * Fields of next that differ from what the server already has.
+ * The backend caches the profile per session, so only changes are sent;
+ * a field that disappeared is sent as null to clear it.
+ */
+export function diffUserContext(previous: UserContext | null, next: UserContext): UserContext | null {
+  if (!previous) return next
+
+  const changes: Record<string, unknown> = {}
+  const keys = new Set([...Object.keys(previous), ...Object.keys(next)]) as Set<keyof UserContext>
+  keys.forEach((key) => {
+    const value = next[key] ?? null
+    if ((previous[key] ?? null) !== value) changes[key] = value
+  })
+  return Object.keys(changes).length > 0 ? (changes as UserContext) : null
+}